@@ -0,0 +1,22 @@
+# app_paths.py
+import os
+import sys
+from pathlib import Path
+
+APP_DIR_NAME = "YouTubeDownloader"
+
+
+def user_cache_dir(*parts):
+    """Per-user cache folder (independent of the working directory), created on demand"""
+    base = os.environ.get('YTD_CACHE_DIR')
+    if not base:
+        home = Path.home()
+        if sys.platform == "win32":
+            base = os.path.join(os.environ.get('LOCALAPPDATA') or str(home / 'AppData' / 'Local'), APP_DIR_NAME)
+        elif sys.platform == "darwin":
+            base = str(home / 'Library' / 'Caches' / APP_DIR_NAME)
+        else:
+            base = os.path.join(os.environ.get('XDG_CACHE_HOME') or str(home / '.cache'), APP_DIR_NAME)
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,119 @@
+# archive_index.py
+import os
+import threading
+
+ARCHIVE_FILENAME = 'downloaded_videos.txt'
+
+
+def archive_key(video_id, extractor):
+    """Archive line for an item, in yt-dlp's "extractor id" format"""
+    return f"{extractor.lower()} {video_id}"
+
+
+class ArchiveIndex:
+    """Hash-set index over a yt-dlp download archive file.
+
+    The file is read once and then only its new tail on refresh(); add()
+    appends a single line. yt-dlp accepts any set-like object as its
+    download_archive option, so the same index can be handed to YoutubeDL.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._keys = set()
+        self._ids = set()
+        self._offset = 0
+        self.refresh()
+
+    def _add_key(self, key):
+        key = key.strip()
+        if not key:
+            return
+        self._keys.add(key)
+        _, _, video_id = key.partition(' ')
+        self._ids.add(video_id or key)
+
+    def refresh(self):
+        """Load lines appended to the file (by us or another process) since the last read"""
+        with self._lock:
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            if size < self._offset:
+                # File was truncated or replaced; start over
+                self._keys.clear()
+                self._ids.clear()
+                self._offset = 0
+            if size == self._offset:
+                return
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+            self._offset += len(data)
+            for line in data.decode('utf-8', errors='ignore').splitlines():
+                self._add_key(line)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(list(self._keys))
+
+    def add(self, key):
+        """Record a downloaded item; called by yt-dlp with an "extractor id" key"""
+        with self._lock:
+            if key in self._keys:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(f"{key}\n")
+            self.refresh()
+
+    def contains(self, video_id, extractor=None):
+        """Exact match on "extractor id", or on the bare id when the extractor is unknown"""
+        if not video_id:
+            return False
+        if extractor:
+            return archive_key(video_id, extractor) in self._keys
+        return video_id in self._ids
+
+    def contains_entry(self, entry):
+        return self.contains(entry.get('id'), entry.get('ie_key') or entry.get('extractor_key'))
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_archive_index(path):
+    """Shared index for an archive file, loaded once per process and kept up to date"""
+    key = os.path.normcase(os.path.abspath(path))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ArchiveIndex(path)
+            return index
+    index.refresh()
+    return index
+
+
+def plan_downloads(entries, positions, index):
+    """Join the selected entries against the archive in one pass, before any download starts.
+
+    positions are 0-based indexes into entries; returns (pending, archived)
+    position lists in input order. Positions without an entry stay pending.
+    """
+    index.refresh()
+    pending, archived = [], []
+    for pos in positions:
+        entry = entries[pos] if 0 <= pos < len(entries) else None
+        if entry is not None and index.contains_entry(entry):
+            archived.append(pos)
+        else:
+            pending.append(pos)
+    return pending, archived
@@ -0,0 +1,95 @@
+"""Cold-start cost of the desktop apps: time until the window is shown, and the heaviest imports.
+
+Each run starts a fresh interpreter with -X importtime, builds the main window
+and shows it without entering the event loop. The first run warms the OS file
+cache and is not counted. The target is a visible window in under 300 ms.
+
+    python -m benchmarks.bench_startup [qt|tk] [runs]
+"""
+import os
+import sys
+import time
+import subprocess
+
+TARGET_MS = 300
+# Modules that must only load on first use, never at startup
+LAZY_MODULES = ('yt_dlp', 'requests', 'sqlite3')
+
+QT_SNIPPET = """
+import sys
+import qt_main
+from PyQt5 import QtWidgets
+app = QtWidgets.QApplication(sys.argv)
+window = qt_main.MainWindow()
+window.show()
+app.processEvents()
+print('shown', flush=True)
+"""
+
+# main.py builds its window at import time and ends in root.mainloop()
+TK_SNIPPET = """
+import tkinter
+tkinter.Misc.mainloop = lambda self, n=0: None
+import main
+main.root.update()
+print('shown', flush=True)
+"""
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(snippet):
+    """(milliseconds until the window was shown, importtime lines)"""
+    env = dict(os.environ)
+    if sys.platform.startswith('linux') and not env.get('DISPLAY'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', snippet], cwd=REPO_DIR, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    elapsed = (time.perf_counter() - start) * 1000
+    _, stderr = proc.communicate()
+    if line.strip() != 'shown':
+        raise RuntimeError(f"window did not show (exit code {proc.returncode}):\n{stderr[-2000:]}")
+    return elapsed, [l for l in stderr.splitlines() if l.startswith('import time:')]
+
+
+def parse_importtime(lines):
+    """[(cumulative_us, depth, module), ...] from -X importtime output"""
+    rows = []
+    for line in lines:
+        try:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            cumulative = int(cumulative)
+        except ValueError:
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((cumulative, depth, name.strip()))
+    return rows
+
+
+def main(app='qt', runs=5):
+    snippet = QT_SNIPPET if app == 'qt' else TK_SNIPPET
+    run_once(snippet)  # warm the file cache
+    results = [run_once(snippet) for _ in range(runs)]
+    times = sorted(ms for ms, _ in results)
+    median = times[len(times) // 2]
+    print(f"{app}: window shown after {median:.0f} ms (median of {runs}, min {times[0]:.0f} ms, target {TARGET_MS} ms)")
+
+    rows = parse_importtime(results[-1][1])
+    # The app module and what it imports directly
+    top = sorted((r for r in rows if r[1] <= 1), reverse=True)
+    print("Slowest imports (cumulative):")
+    for cumulative, depth, name in top[:12]:
+        print(f"  {cumulative / 1000:7.1f} ms  {'  ' * depth}{name}")
+    loaded = {name for _, _, name in rows}
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    if eager:
+        print(f"Imported at startup but should be lazy: {', '.join(eager)}")
+    return 0 if median <= TARGET_MS and not eager else 1
+
+
+if __name__ == '__main__':
+    app = sys.argv[1] if len(sys.argv) > 1 else 'qt'
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    sys.exit(main(app, runs))
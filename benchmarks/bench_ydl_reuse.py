@@ -0,0 +1,63 @@
+"""Per-item overhead of building a YoutubeDL for every item versus re-targeting a pooled one.
+
+No network access: it measures only the setup work a download pays before
+extraction starts (extractor registry, cookie-jar parsing, post-processors).
+
+    python -m benchmarks.bench_ydl_reuse [items]
+"""
+import os
+import sys
+import time
+import tempfile
+
+from yt_dlp import YoutubeDL
+
+from ydl_pool import YoutubeDLPool
+
+
+def _write_cookies(path, count=2000):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# Netscape HTTP Cookie File\n")
+        for i in range(count):
+            f.write(f".youtube.com\tTRUE\t/\tTRUE\t2000000000\tname{i}\tvalue{i}\n")
+
+
+def _item_opts(i, cookies):
+    return {
+        'quiet': True,
+        'format': 'bestvideo[height<=720]+bestaudio/best',
+        'outtmpl': f'{i:03d} - %(title)s.%(ext)s',
+        'paths': {'home': tempfile.gettempdir()},
+        'cookiefile': cookies,
+        'postprocessors': [{'key': 'FFmpegVideoRemuxer', 'preferedformat': 'mkv'}],
+        'progress_hooks': [lambda d: None],
+    }
+
+
+def main(items=50):
+    with tempfile.TemporaryDirectory() as tmp:
+        cookies = os.path.join(tmp, 'cookies.txt')
+        _write_cookies(cookies)
+        # Warm imports and plugin loading so both runs start from the same state
+        YoutubeDL({'quiet': True}).close()
+
+        start = time.perf_counter()
+        for i in range(items):
+            with YoutubeDL(_item_opts(i, cookies)) as ydl:
+                ydl.cookiejar  # opened on first use, as every download does
+        fresh = (time.perf_counter() - start) / items
+
+        start = time.perf_counter()
+        with YoutubeDLPool() as pool:
+            for i in range(items):
+                pool.acquire(_item_opts(i, cookies)).cookiejar
+        pooled = (time.perf_counter() - start) / items
+
+    print(f"items: {items}")
+    print(f"new YoutubeDL per item: {fresh * 1000:8.2f} ms/item")
+    print(f"pooled YoutubeDL:       {pooled * 1000:8.2f} ms/item")
+    print(f"speedup:                {fresh / pooled if pooled else float('inf'):8.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
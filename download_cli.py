@@ -0,0 +1,220 @@
+# download_cli.py
+"""Headless batch downloads with the same engine as the desktop app.
+
+    python -m download_cli URL [URL ...]
+    python -m download_cli -i urls.txt -o /srv/media --mode audio -j 4
+
+Progress is printed to stdout as JSON lines (one event object per line) or,
+with --text, as plain status lines. Never imports Tk or PyQt5.
+"""
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+import threading
+
+from download_engine import DownloadEngine, list_entries
+from output_plan import AUDIO_TARGETS, DEFAULT_AUDIO_TARGET, DEFAULT_CONTAINER, VIDEO_CONTAINERS
+from progress import format_batch, format_snapshot
+from scheduler import DEFAULT_MAX_WORKERS
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1            # some items failed
+EXIT_USAGE = 2              # bad arguments (argparse uses 2 as well)
+EXIT_FAILED = 3             # nothing could be downloaded
+EXIT_INTERRUPTED = 130
+
+MODES = {'video': 'Video', 'audio': 'Audio', 'captions': 'Captions'}
+# One part of an --items spec: "3", "2-5", "7-" or "-4"
+_ITEMS_PART = re.compile(r'\d+|\d*-\d*')
+
+
+def read_urls(path):
+    """URLs from a file (or '-' for stdin), one per line; blank lines and # comments are skipped"""
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def valid_items(spec):
+    """True when spec is a comma-separated list of positions and ranges"""
+    parts = [part.strip() for part in spec.split(',') if part.strip()]
+    return bool(parts) and all(_ITEMS_PART.fullmatch(part) for part in parts)
+
+
+def parse_items(spec, count):
+    """1-based positions from a yt-dlp style spec such as "1-3,7,10-"; None selects everything.
+
+    Positions outside 1..count are dropped, so the result may be empty.
+    """
+    if not spec:
+        return list(range(1, count + 1))
+    selected = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition('-')
+        first = int(start) if start else 1
+        last = (int(end) if end else count) if sep else first
+        selected.update(i for i in range(first, last + 1) if 1 <= i <= max(count, 1))
+    return sorted(selected)
+
+
+class Reporter:
+    """Writes engine events to a stream, serialized across download threads"""
+
+    def __init__(self, stream=None, as_json=True):
+        self.stream = stream or sys.stdout
+        self.as_json = as_json
+        self._lock = threading.Lock()
+
+    def event(self, name, text=None, **fields):
+        if self.as_json:
+            line = json.dumps({'event': name, **fields}, ensure_ascii=False, default=str)
+        else:
+            line = text if text is not None else f"{name}: {fields}"
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+    def status(self, text):
+        self.event('status', text, message=text)
+
+    def progress(self, snapshots):
+        for s in snapshots:
+            self.event('item', format_snapshot(s), **s)
+
+    def batch(self, summary):
+        self.event('batch', f"Batch: {format_batch(summary)}", **summary)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m download_cli', description='Download videos, audio or captions without the GUI.')
+    parser.add_argument('urls', nargs='*', metavar='URL', help='URLs to download (videos or playlists)')
+    parser.add_argument('-i', '--input', action='append', default=[], metavar='FILE', help="file with one URL per line ('-' for stdin); may be repeated")
+    parser.add_argument('-o', '--output', default=os.path.join(os.getcwd(), 'YouTube_Downloads'), metavar='DIR', help='download folder (default: ./YouTube_Downloads)')
+    parser.add_argument('-m', '--mode', choices=sorted(MODES), default='video')
+    parser.add_argument('-f', '--format', default=None, help='yt-dlp format selector (default: best)')
+    parser.add_argument('--items', default=None, metavar='SPEC', help='playlist items to download, e.g. "1-5,8" (default: all)')
+    parser.add_argument('--cookies', default=None, metavar='FILE', help='cookies.txt for sites that need a login')
+    parser.add_argument('--lang', default='en', help='captions language (captions mode)')
+    parser.add_argument('--audio-format', choices=AUDIO_TARGETS, default=DEFAULT_AUDIO_TARGET,
+                        help='audio mode output; auto keeps the source codec without re-encoding')
+    parser.add_argument('--container', choices=VIDEO_CONTAINERS, default=DEFAULT_CONTAINER,
+                        help='video mode output container, written in one pass')
+    parser.add_argument('-j', '--parallel', type=int, default=DEFAULT_MAX_WORKERS, metavar='N', help='items downloaded at the same time')
+    parser.add_argument('--no-archive', action='store_true', help='download items even if already in the download archive')
+    parser.add_argument('--refresh', action='store_true', help='ignore cached metadata')
+    parser.add_argument('--skip-setup', action='store_true', help='do not check for or download FFmpeg')
+    parser.add_argument('--text', action='store_true', help='plain status lines instead of JSON lines')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log details to stderr')
+    return parser
+
+
+def run_job(url, args, reporter):
+    """Download one URL; returns (succeeded, failed) item counts"""
+    mode = MODES[args.mode]
+    entries = []
+    if mode != 'Captions':
+        from url_resolver import resolve_final_url
+        url = resolve_final_url(url)
+        entries = list_entries(url, cookies_path=args.cookies, bypass_cache=args.refresh)
+    selected = parse_items(args.items, len(entries)) if entries else [1]
+    if not selected:
+        # Never hand the engine an empty selection
+        reporter.event('error', f"{url}: --items {args.items} selects none of {len(entries)} item(s)",
+                       url=url, message=f"no items match --items {args.items}", items=len(entries))
+        return 0, 1
+    reporter.event('job', f"{url}: {len(selected)} item(s)", url=url, items=len(selected))
+    engine = DownloadEngine(
+        url=url,
+        download_dir=args.output,
+        mode=mode,
+        selected_indices=selected,
+        quality_selector=args.format,
+        cookies_path=args.cookies,
+        captions_lang=args.lang,
+        audio_target=args.audio_format,
+        container=args.container,
+        use_archive=not args.no_archive,
+        entries=entries,
+        use_cache=not args.refresh,
+        # yt-dlp's own output would mix into the event stream; its messages go to stderr through logging
+        quiet=True,
+        logger=logging.getLogger('yt_dlp'),
+        max_parallel=args.parallel,
+        on_status=reporter.status,
+        on_progress=reporter.progress,
+        on_batch=reporter.batch,
+    )
+    if mode == 'Captions':
+        target_dir = engine.download_captions()
+        reporter.event('done', f"Captions saved to: {target_dir}", url=url, succeeded=1, failed=0, output=target_dir)
+        return 1, 0
+    try:
+        results = engine.run()
+    except KeyboardInterrupt:
+        engine.cancel()
+        raise
+    succeeded = sum(1 for r in results if r.ok)
+    failed = [r.index for r in results if not r.ok]
+    reporter.event('done', f"{url}: {succeeded} downloaded, {len(failed)} failed",
+                   url=url, succeeded=succeeded, failed=len(failed), failed_items=failed)
+    return succeeded, len(failed)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        urls = list(args.urls)
+        for path in args.input:
+            urls.extend(read_urls(path))
+    except OSError as e:
+        parser.error(str(e))
+    if not urls:
+        parser.error('no URLs given (pass URLs or --input FILE)')
+    if args.items is not None and not valid_items(args.items):
+        parser.error(f'invalid --items spec: {args.items!r} (expected positions and ranges such as "1-5,8")')
+
+    if not args.skip_setup:
+        from setup_helper import download_and_setup_ffmpeg
+        try:
+            # stdout carries only events; setup messages go to stderr
+            download_and_setup_ffmpeg(on_status=lambda text: print(text, file=sys.stderr))
+        except Exception as e:
+            logging.warning(f"FFmpeg setup failed, post-processing may not work: {e}")
+
+    reporter = Reporter(as_json=not args.text)
+    total_ok = total_failed = 0
+    try:
+        for url in urls:
+            try:
+                ok, failed = run_job(url, args, reporter)
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                logging.debug("Job failed", exc_info=True)
+                reporter.event('error', f"{url}: {e}", url=url, message=str(e))
+                ok, failed = 0, 1
+            total_ok += ok
+            total_failed += failed
+    except KeyboardInterrupt:
+        reporter.event('interrupted', 'Interrupted', succeeded=total_ok, failed=total_failed)
+        return EXIT_INTERRUPTED
+    reporter.event('summary', f"Downloaded {total_ok}, failed {total_failed}", succeeded=total_ok, failed=total_failed)
+    if not total_failed:
+        return EXIT_OK
+    return EXIT_PARTIAL if total_ok else EXIT_FAILED
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,323 @@
+# download_engine.py
+import os
+import re
+import logging
+import threading
+from collections import namedtuple
+
+import metadata_cache
+from archive_index import ARCHIVE_FILENAME, get_archive_index
+from http_client import USER_AGENT
+from output_plan import DEFAULT_AUDIO_TARGET, DEFAULT_CONTAINER, audio_plan, video_plan
+from playlist import DEFAULT_OUTTMPL, PlaylistEntry, entry_outtmpl
+from progress import BatchProgress, ProgressAggregator
+from scheduler import DownloadScheduler, DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT
+from ydl_pool import YoutubeDLPool
+
+MAX_ATTEMPTS = 5
+
+# Outcome of one selected item; error is the last failure message, or None
+ItemResult = namedtuple('ItemResult', 'index ok error')
+
+
+def safe_dirname(name):
+    """Folder name for a playlist title, without characters Windows rejects"""
+    return re.sub(r'[\\/:*?"<>|]+', '_', str(name or 'NA')).strip() or 'NA'
+
+
+class DownloadEngine:
+    """Download selected items of a URL with the shared pool, scheduler, archive and cache.
+
+    GUI-free: both desktop apps and the command line drive it, so every
+    front end gets the same yt-dlp options. Callbacks are optional and run on
+    the download threads:
+
+    - on_status(text): start, retry and post-processing messages
+    - on_progress(snapshots): coalesced per-item progress (see progress.py)
+    - on_batch(summary): byte-weighted progress of the whole selection
+    - on_counts(succeeded, failed, total): after every finished item
+    - on_retry(label, title, attempts): after MAX_ATTEMPTS failures of an
+      item; returning True grants it MAX_ATTEMPTS more
+
+    selected_indices are 1-based playlist positions (None selects every
+    entry, or the single video without entries); with entries (fetched
+    PlaylistEntry records) each item is downloaded from its own URL.
+    Positions in redownload skip the download archive, and with
+    playlist_subdirs every item goes to a folder named after its playlist.
+    audio_target and container pick the Audio and Video mode output (see
+    output_plan). With quiet, yt-dlp prints nothing to stdout (no progress
+    lines either); logger receives its messages instead.
+    """
+
+    def __init__(self, *,
+                 url,
+                 download_dir,
+                 mode='Video',
+                 selected_indices=None,
+                 quality_selector=None,
+                 cookies_path=None,
+                 captions_lang='en',
+                 audio_target=DEFAULT_AUDIO_TARGET,
+                 container=DEFAULT_CONTAINER,
+                 use_archive=True,
+                 entries=None,
+                 use_cache=True,
+                 quiet=False,
+                 logger=None,
+                 redownload=(),
+                 playlist_subdirs=False,
+                 max_parallel=DEFAULT_MAX_WORKERS,
+                 per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                 on_status=None,
+                 on_progress=None,
+                 on_batch=None,
+                 on_counts=None,
+                 on_retry=None):
+        self.url = url
+        self.download_dir = download_dir
+        self.mode = mode
+        self.entries = entries or []
+        if selected_indices is None:
+            selected_indices = range(1, len(self.entries) + 1) or [1]
+        # An explicit empty selection stays empty; only None means everything
+        self.selected_indices = list(selected_indices)
+        self.quality_selector = quality_selector
+        self.cookies_path = cookies_path
+        self.captions_lang = captions_lang
+        self.audio_target = audio_target
+        self.container = container
+        self.use_archive = use_archive
+        self.use_cache = use_cache
+        self.quiet = quiet
+        self.logger = logger
+        self.redownload = set(redownload)
+        self.playlist_subdirs = playlist_subdirs
+        self.max_parallel = max_parallel
+        self.per_host_limit = per_host_limit
+        self.on_status = on_status
+        self.on_progress = on_progress
+        self.on_batch = on_batch
+        self.on_counts = on_counts
+        self.on_retry = on_retry
+        self.success_count = 0
+        self.failure_count = 0
+        self._counts_lock = threading.Lock()
+        self._scheduler = None
+        self._cancelled = False
+        self._ydl_pool = YoutubeDLPool()
+        # yt-dlp calls progress hooks for every chunk and fragment; only coalesced snapshots go out
+        self._progress = ProgressAggregator(self._emit_progress)
+        self._batch = BatchProgress(len(self.selected_indices))
+
+    def cancel(self):
+        """Start no further items; items already downloading finish"""
+        self._cancelled = True
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+
+    def _status(self, text):
+        if self.on_status:
+            self.on_status(text)
+
+    def _emit_progress(self, snapshots):
+        self._batch.update(snapshots)
+        if self.on_progress:
+            self.on_progress(snapshots)
+        if self.on_batch:
+            self.on_batch(self._batch.summary())
+
+    def _postprocessor_hook(self, d, label=''):
+        prefix = f"[{label}] " if label else ''
+        name = (d.get('postprocessor') or '').replace('FFmpeg', '')
+        if d.get('status') == 'started':
+            self._status(f"{prefix}Post-processing: {name}...")
+        elif d.get('status') == 'finished':
+            self._status(f"{prefix}Post-processing done: {name}")
+
+    def _entry_for(self, idx):
+        if 0 < idx <= len(self.entries):
+            return self.entries[idx - 1]
+        return None
+
+    def _item_target(self, idx):
+        # Download fetched entries from their own URL so the playlist is not re-extracted per item
+        entry = self._entry_for(idx)
+        return (entry.url if entry else None) or self.url
+
+    def _item_dir(self, idx):
+        if not self.playlist_subdirs:
+            return self.download_dir
+        entry = self._entry_for(idx)
+        target_dir = os.path.join(self.download_dir, safe_dirname(entry.playlist if entry else None))
+        os.makedirs(target_dir, exist_ok=True)
+        return target_dir
+
+    def _item_options(self, idx, label, url):
+        entry = self._entry_for(idx)
+        outtmpl = entry_outtmpl(entry, len(self.entries)) if url != self.url else DEFAULT_OUTTMPL
+        target_dir = self._item_dir(idx)
+        paths = {'home': target_dir, 'temp': target_dir}
+        # format and postprocessors come from the output plan below
+        ydl_opts_item = {
+            'outtmpl': outtmpl,
+            'paths': paths,
+            'ignoreerrors': False,
+            'progress_hooks': [self._progress.hook(label)],
+            'postprocessor_hooks': [lambda d: self._postprocessor_hook(d, label)],
+            'retries': 10,
+            'fragment_retries': 10,
+            'concurrent_fragment_downloads': 3,
+            'windowsfilenames': True,
+            'restrictfilenames': True,
+            'socket_timeout': 60,
+            'http_timeout': 60,
+            'extractor_retries': 3,
+            'http_headers': {
+                'User-Agent': USER_AGENT,
+                'Referer': self.url,
+            },
+        }
+        self._apply_output(ydl_opts_item)
+        if url == self.url:
+            ydl_opts_item['playlist_items'] = str(idx)
+        if self.cookies_path:
+            ydl_opts_item['cookiefile'] = self.cookies_path
+        if self.use_archive and idx not in self.redownload:
+            ydl_opts_item['download_archive'] = get_archive_index(os.path.join(self.download_dir, ARCHIVE_FILENAME))
+
+        if self.mode == 'Audio':
+            ydl_opts_item.update(audio_plan(self.audio_target, self.quality_selector))
+        else:
+            ydl_opts_item.update(video_plan(self.container, self.quality_selector))
+        return ydl_opts_item
+
+    def _apply_output(self, opts):
+        if self.quiet:
+            opts['quiet'] = True
+            opts['noprogress'] = True
+        if self.logger is not None:
+            opts['logger'] = self.logger
+
+    def _download_item(self, offset, idx, url, total_items):
+        """True once the item is downloaded, else the last error message"""
+        label = f"{offset}/{total_items}"
+        entry = self._entry_for(idx)
+        title = (entry.title if entry else None) or f"item {idx}"
+        ydl_opts_item = self._item_options(idx, label, url)
+        attempts = 0
+        while True:
+            try:
+                self._status(f"Starting: {title} ({label})")
+                ydl = self._ydl_pool.acquire(ydl_opts_item)
+                if self.use_cache:
+                    metadata_cache.download(ydl, url)
+                else:
+                    ydl.download([url])
+                return True
+            except Exception as e:
+                # Retry on a fresh instance in case the failure left it in a bad state
+                self._ydl_pool.discard()
+                attempts += 1
+                logging.error(f"Download failed for '{title}' (item {idx}) attempt {attempts}: {e}")
+                self._status(f"[{label}] Error: {title} (attempt {attempts}/{MAX_ATTEMPTS})")
+                if self._cancelled:
+                    return str(e)
+                if attempts >= MAX_ATTEMPTS:
+                    if self.on_retry and self.on_retry(label, title, attempts):
+                        attempts = 0
+                        continue
+                    return str(e)
+
+    def _on_item_done(self, total_items, ok, label=''):
+        with self._counts_lock:
+            if ok:
+                self.success_count += 1
+            else:
+                self.failure_count += 1
+            if self.on_counts:
+                self.on_counts(self.success_count, self.failure_count, total_items)
+        self._progress.flush()
+        self._batch.item_done(label)
+        if self.on_batch:
+            self.on_batch(self._batch.summary())
+
+    def download_captions(self):
+        """Captions mode: fetch subtitles only; returns the folder they were saved to"""
+        from yt_dlp import YoutubeDL
+        target_dir = os.path.join(self.download_dir, 'captions')
+        os.makedirs(target_dir, exist_ok=True)
+        opts = {
+            'skip_download': True,
+            'writeautomaticsub': True,
+            'writesubtitles': True,
+            'subtitleslangs': [self.captions_lang or 'en'],
+            'outtmpl': os.path.join(target_dir, '%(title)s.%(ext)s'),
+            'subtitle_format': 'vtt',
+            'quiet': False,
+            'ignoreerrors': True,
+        }
+        if self.cookies_path:
+            opts['cookiefile'] = self.cookies_path
+        self._apply_output(opts)
+        with YoutubeDL(opts) as ydl:
+            ydl.download([self.url])
+        return target_dir
+
+    def run(self):
+        """Download every selected item; returns ItemResult records in playlist order"""
+        os.makedirs(self.download_dir, exist_ok=True)
+        os.makedirs(os.path.join(self.download_dir, 'audio_only'), exist_ok=True)
+        self.success_count = 0
+        self.failure_count = 0
+        total_items = len(self.selected_indices)
+        if self.on_counts:
+            self.on_counts(0, 0, total_items)
+
+        # Offsets follow playlist order so labels and results line up with the list
+        ordered = sorted(self.selected_indices)
+        offsets = {idx: offset for offset, idx in enumerate(ordered, start=1)}
+        self._scheduler = DownloadScheduler(self.max_parallel, self.per_host_limit)
+        if self._cancelled:
+            self._scheduler.cancel()
+        with self._ydl_pool:
+            results = self._scheduler.run(
+                [(idx, self._item_target(idx)) for idx in ordered],
+                lambda idx, url: self._download_item(offsets[idx], idx, url, total_items),
+                on_result=lambda idx, ok: self._on_item_done(total_items, ok is True, f"{offsets[idx]}/{total_items}"),
+            )
+        self._progress.flush()
+        done = {idx for idx, _ in results}
+        out = [ItemResult(idx, ok is True, None if ok is True else str(ok)) for idx, ok in results]
+        # Items never started because of cancel() count as failed
+        return out + [ItemResult(idx, False, 'Cancelled') for idx in ordered if idx not in done]
+
+
+def list_entries(url, *, cookies_path=None, bypass_cache=False):
+    """Flat-extract a URL into PlaylistEntry records (one record for a single video)"""
+    opts = {
+        'extract_flat': True,
+        'quiet': True,
+        'skip_download': True,
+        'socket_timeout': 60,
+        'http_timeout': 60,
+        'extractor_retries': 3,
+        'http_headers': {
+            'User-Agent': USER_AGENT,
+            'Referer': url,
+        },
+    }
+    if cookies_path:
+        opts['cookiefile'] = cookies_path
+    info = metadata_cache.extract_info(url, opts, bypass=bypass_cache)
+    if not isinstance(info, dict):
+        return []
+    if 'entries' not in info:
+        return [PlaylistEntry.from_info(info)]
+    extra = {'playlist': info.get('title') or info.get('id')}
+    entries = []
+    for i, entry in enumerate(info.get('entries') or [], start=1):
+        if isinstance(entry, dict):
+            entry = {**extra, **entry}
+            entry.setdefault('playlist_index', i)
+            entries.append(PlaylistEntry.from_info(entry))
+    return entries
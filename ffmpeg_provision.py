@@ -0,0 +1,235 @@
+# ffmpeg_provision.py
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import platform
+import threading
+import subprocess
+from collections import namedtuple
+
+from app_paths import user_cache_dir
+from http_client import download_file
+
+# A static FFmpeg build for one platform; checksum_url serves the hex digest of the archive
+Build = namedtuple('Build', 'name url checksum_url algorithm binaries')
+
+BUILDS = {
+    'Windows': Build(
+        'essentials',
+        'https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip',
+        'https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip.sha256',
+        'sha256',
+        ('ffmpeg.exe', 'ffprobe.exe'),
+    ),
+    'Linux': Build(
+        'amd64-static',
+        'https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz',
+        'https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz.md5',
+        'md5',
+        ('ffmpeg', 'ffprobe'),
+    ),
+}
+STATE_FILE = 'installed.json'
+
+_lock = threading.Lock()
+
+
+def cache_root():
+    """Per-user FFmpeg cache, independent of the working directory"""
+    return user_cache_dir('ffmpeg')
+
+
+def add_to_path(directory):
+    """Append directory to PATH unless it is already there"""
+    if directory not in os.environ.get('PATH', '').split(os.pathsep):
+        os.environ['PATH'] = os.environ.get('PATH', '') + os.pathsep + directory
+
+
+def file_digest(path, algorithm, chunk_size=1024 * 1024):
+    h = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fetch_checksum(build, directory):
+    """Expected digest of the build's archive, read from its checksum file"""
+    path = os.path.join(directory, os.path.basename(build.checksum_url))
+    download_file(build.checksum_url, path)
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        digest = f.read().split()
+    os.remove(path)
+    if not digest or not re.fullmatch(r'[0-9a-fA-F]+', digest[0]):
+        raise RuntimeError(f"Unreadable checksum file: {build.checksum_url}")
+    return digest[0].lower()
+
+
+def _members(archive):
+    """(member name, open function) for each file in a zip or tar archive, streamed in archive order"""
+    if archive.endswith('.zip'):
+        import zipfile
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    yield info.filename, lambda info=info: zf.open(info)
+    else:
+        import tarfile
+        # 'r|*' reads the compressed stream once from start to end, without seeking
+        with tarfile.open(archive, 'r|*') as tf:
+            for member in tf:
+                if member.isfile():
+                    yield member.name, lambda member=member: tf.extractfile(member)
+
+
+def extract_binaries(archive, names, target_dir):
+    """Write only the members whose file name is in names to target_dir.
+
+    Returns the archive's top-level folder name (the build version for the
+    usual static builds), or None when members are not in a folder.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    wanted = set(names)
+    top = None
+    for name, open_member in _members(archive):
+        parts = name.replace('\\', '/').split('/')
+        if top is None and len(parts) > 1:
+            top = parts[0]
+        if parts[-1] not in wanted:
+            continue
+        dest = os.path.join(target_dir, parts[-1])
+        with open_member() as src, open(dest + '.tmp', 'wb') as out:
+            shutil.copyfileobj(src, out, 1024 * 1024)
+        os.chmod(dest + '.tmp', 0o755)
+        os.replace(dest + '.tmp', dest)
+        wanted.discard(parts[-1])
+        if not wanted:
+            break
+    if wanted:
+        raise RuntimeError(f"{', '.join(sorted(wanted))} not found in {os.path.basename(archive)}")
+    return top
+
+
+def probe_version(binary):
+    """Version string from `ffmpeg -version`, or None"""
+    try:
+        proc = subprocess.run([binary, '-version'], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.match(r'\S+ version (\S+)', proc.stdout)
+    return match.group(1) if proc.returncode == 0 and match else None
+
+
+class FFmpegProvisioner:
+    """Download, verify and unpack a static FFmpeg build into the user cache.
+
+    Layout under root: downloads/ holds the archive while it downloads (a
+    .part file that later runs resume), <build name>/<version>/ holds
+    ffmpeg and ffprobe, and installed.json records the installed version
+    directory, its probed version and the binary's size and mtime, so later
+    runs trust it without probing again.
+    """
+
+    def __init__(self, build=None, root=None):
+        self.build = build or BUILDS.get(platform.system())
+        self.root = root or cache_root()
+        self.state_path = os.path.join(self.root, STATE_FILE)
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get(self.build.name)
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _write_state(self, record):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state[self.build.name] = record
+        with open(self.state_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(self.state_path + '.tmp', self.state_path)
+
+    def _stat_key(self, binary):
+        st = os.stat(binary)
+        return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+    def installed(self):
+        """Directory with the verified binaries from an earlier run, or None"""
+        record = self._read_state()
+        if not record:
+            return None
+        binary = os.path.join(record.get('dir', ''), self.build.binaries[0])
+        try:
+            if {k: record.get(k) for k in ('size', 'mtime_ns')} != self._stat_key(binary):
+                return None
+        except OSError:
+            return None
+        if not all(os.path.exists(os.path.join(record['dir'], name)) for name in self.build.binaries):
+            return None
+        return record['dir']
+
+    def version(self):
+        """Probed version of the installed build (remembered, not probed again)"""
+        record = self._read_state()
+        return record.get('version') if record else None
+
+    def install(self, on_status=None):
+        """Download (resuming a partial archive), verify, extract; returns the binaries' directory"""
+        status = on_status or (lambda text: logging.info(text))
+        downloads = os.path.join(self.root, 'downloads')
+        os.makedirs(downloads, exist_ok=True)
+        archive = os.path.join(downloads, os.path.basename(self.build.url))
+        expected = fetch_checksum(self.build, downloads)
+        status("Downloading FFmpeg...")
+        download_file(self.build.url, archive, resume=True)
+        actual = file_digest(archive, self.build.algorithm)
+        if actual != expected:
+            os.remove(archive)
+            raise RuntimeError(f"FFmpeg archive checksum mismatch ({self.build.algorithm} {actual}, expected {expected})")
+
+        status("Unpacking FFmpeg...")
+        staging = os.path.join(self.root, self.build.name, '.staging')
+        shutil.rmtree(staging, ignore_errors=True)
+        top = extract_binaries(archive, self.build.binaries, staging)
+        version_dir = os.path.join(self.root, self.build.name, re.sub(r'[^\w.+-]+', '_', top or actual[:12]))
+        shutil.rmtree(version_dir, ignore_errors=True)
+        os.replace(staging, version_dir)
+        os.remove(archive)
+
+        binary = os.path.join(version_dir, self.build.binaries[0])
+        self._write_state({
+            'dir': version_dir,
+            'version': probe_version(binary),
+            'checksum': f"{self.build.algorithm}:{actual}",
+            **self._stat_key(binary),
+        })
+        return version_dir
+
+    def ensure(self, on_status=None):
+        """Directory with ffmpeg and ffprobe, installing the build first if needed"""
+        with _lock:
+            return self.installed() or self.install(on_status)
+
+
+def ensure_ffmpeg(on_status=None, prefer_system=True):
+    """Make ffmpeg and ffprobe available on PATH; returns the directory added, or None.
+
+    A system FFmpeg is used as is. Otherwise the cached build for this
+    platform is put on PATH, downloading it first on the first run.
+    """
+    if prefer_system and shutil.which('ffmpeg') and shutil.which('ffprobe'):
+        return None
+    provisioner = FFmpegProvisioner()
+    if provisioner.build is None:
+        logging.warning(f"No FFmpeg build for {platform.system()}; install FFmpeg and add it to PATH")
+        return None
+    directory = provisioner.ensure(on_status)
+    add_to_path(directory)
+    return directory
@@ -0,0 +1,322 @@
+# ffmpeg_tools.py
+import os
+import time
+import logging
+import threading
+import subprocess
+from collections import deque
+
+from progress import format_eta
+from scheduler import DownloadScheduler
+
+# Stream copy is bound by disk throughput, not CPU: a few workers overall,
+# and at most two per physical disk so one drive is not thrashed by seeks.
+DEFAULT_MAX_WORKERS = max(1, min(4, os.cpu_count() or 1))
+DEFAULT_PER_DISK_LIMIT = 2
+
+# ffmpeg writes key=value progress blocks to stdout; only the last lines of
+# stderr are kept for error messages, whatever the length of the file.
+PROGRESS_ARGS = ['-progress', 'pipe:1', '-nostats']
+STDERR_TAIL_LINES = 40
+
+# An existing MP4 counts as a finished conversion when it is newer than its
+# source and its duration matches within this many seconds.
+DURATION_TOLERANCE = 1.0
+UP_TO_DATE = "Up to date"
+PART_SUFFIX = '.part'
+
+
+def mp4_target(input_file):
+    """Output path for a conversion, or None when the input already is an MP4"""
+    base, _ = os.path.splitext(input_file)
+    output_file = f"{base}.mp4"
+    if os.path.normpath(input_file).lower() == os.path.normpath(output_file).lower():
+        return None
+    return output_file
+
+
+def remux_command(input_file, output_file):
+    # The muxer is named explicitly since a .part file has no usable extension
+    return ['ffmpeg', '-y', *PROGRESS_ARGS, '-i', input_file, '-c:v', 'copy', '-c:a', 'copy', '-f', 'mp4', output_file]
+
+
+def probe_duration(path):
+    """Duration of a media file in seconds according to ffprobe, or None"""
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', path]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        return float(proc.stdout.strip()) or None
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def _parse_float(value):
+    try:
+        return float(value.rstrip('x'))
+    except (AttributeError, ValueError):
+        return None
+
+
+class ProgressParser:
+    """Incremental parser for the key=value stream of ffmpeg -progress.
+
+    feed() takes one line at a time and returns a progress dict at the end
+    of every block (the "progress=continue|end" line), otherwise None.
+    """
+
+    def __init__(self, duration=None):
+        self.duration = duration
+        self._block = {}
+        self._start = time.monotonic()
+
+    def feed(self, line):
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return None
+        if key != 'progress':
+            self._block[key] = value
+            return None
+        block, self._block = self._block, {}
+        return self._snapshot(block, value)
+
+    def _snapshot(self, block, state):
+        # out_time_ms is in microseconds as well (a long-standing ffmpeg quirk)
+        micros = _parse_float(block.get('out_time_us') or block.get('out_time_ms'))
+        out_time = micros / 1e6 if micros is not None and micros >= 0 else None
+        speed = _parse_float(block.get('speed'))
+        if not speed and out_time:
+            elapsed = time.monotonic() - self._start
+            speed = out_time / elapsed if elapsed > 0 else None
+        percent = eta = None
+        if self.duration and out_time is not None:
+            percent = min(100.0, out_time * 100 / self.duration)
+            if speed:
+                eta = max(0.0, (self.duration - out_time) / speed)
+        if state == 'end':
+            percent, eta = 100.0, 0.0
+        return {
+            'status': 'end' if state == 'end' else 'continue',
+            'out_time': out_time,
+            'duration': self.duration,
+            'percent': percent,
+            'speed': speed,
+            'eta': eta,
+            'total_size': int(_parse_float(block.get('total_size')) or 0),
+        }
+
+
+def run_ffmpeg(cmd, duration=None, on_progress=None):
+    """Run an ffmpeg command built with PROGRESS_ARGS, parsing its progress as it streams.
+
+    on_progress(d) gets each ProgressParser snapshot. Returns (returncode,
+    last lines of stderr).
+    """
+    tail = deque(maxlen=STDERR_TAIL_LINES)
+    parser = ProgressParser(duration)
+    with subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          text=True, encoding='utf-8', errors='replace') as proc:
+        # Drain stderr on its own thread so a chatty ffmpeg never blocks on a full pipe
+        drain = threading.Thread(target=lambda: tail.extend(proc.stderr), daemon=True)
+        drain.start()
+        finished = False
+        try:
+            for line in proc.stdout:
+                d = parser.feed(line)
+                if d is not None and on_progress:
+                    on_progress(d)
+            finished = True
+        finally:
+            if not finished:
+                # on_progress raised: stop ffmpeg before the caller removes its output
+                proc.kill()
+            returncode = proc.wait()
+            drain.join()
+    return returncode, ''.join(tail).strip()
+
+
+def is_up_to_date(input_file, output_file, duration=None):
+    """True when output_file is a complete conversion of input_file from an earlier run.
+
+    The target must be non-empty, at least as new as the source, and (when
+    ffprobe can read the source) have the same duration. duration is the
+    source's, if already probed.
+    """
+    try:
+        src, dst = os.stat(input_file), os.stat(output_file)
+    except OSError:
+        return False
+    if dst.st_size == 0 or dst.st_mtime < src.st_mtime:
+        return False
+    if duration is None:
+        duration = probe_duration(input_file)
+    if duration is None:
+        return True  # no ffprobe or unreadable source; mtime and size are all we have
+    target = probe_duration(output_file)
+    return target is not None and abs(target - duration) <= DURATION_TOLERANCE
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def convert_to_mp4(input_file, on_progress=None, incremental=True):
+    """Remux a single file to MP4 (stream copy). Returns (success, output path or error).
+
+    ffmpeg writes to a .part file that is renamed over the target only once
+    it is complete, so an interrupted batch never leaves a truncated MP4.
+    With incremental, a valid MP4 from an earlier run is kept and
+    (True, UP_TO_DATE) is returned.
+    """
+    output_file = mp4_target(input_file)
+    if output_file is None:
+        return True, "Already MP4"
+    duration = probe_duration(input_file)
+    if incremental and is_up_to_date(input_file, output_file, duration):
+        return True, UP_TO_DATE
+    part_file = output_file + PART_SUFFIX
+    try:
+        returncode, stderr = run_ffmpeg(remux_command(input_file, part_file), duration, on_progress)
+    except FileNotFoundError:
+        return False, "FFmpeg not found. Install and add to PATH."
+    except Exception as e:
+        _remove(part_file)
+        return False, str(e)
+    if returncode != 0:
+        _remove(part_file)
+        return False, stderr or f"ffmpeg exited with code {returncode}"
+    try:
+        os.replace(part_file, output_file)
+    except OSError as e:
+        _remove(part_file)
+        return False, str(e)
+    return True, output_file
+
+
+def disk_key(path):
+    """Device a file lives on, used to cap concurrent conversions per disk"""
+    try:
+        return os.stat(os.path.dirname(os.path.abspath(path)) or '.').st_dev
+    except OSError:
+        return None
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def format_progress(d):
+    """One status line for a conversion progress event"""
+    name = os.path.basename(d['filename'])
+    if d['status'] == 'progress':
+        percent = f"{d['percent']:.0f}%" if d.get('percent') is not None else '...'
+        speed = f" at {d['speed']:.1f}x" if d.get('speed') else ''
+        state = f"Converting {name}: {percent}{speed}"
+    else:
+        state = {'started': 'Converting', 'finished': 'Converted', 'skipped': 'Up to date:', 'error': 'Failed'}[d['status']] + f" {name}"
+    return f"[{d['completed'] + d['failed']}/{d['total']}] {state} - ETA {format_eta(d['eta'])}"
+
+
+class ConversionPool:
+    """Convert many files concurrently with a cap per disk and an aggregate ETA.
+
+    Each file runs in its own ffmpeg process; the threads of a
+    DownloadScheduler only wait on them. on_progress(d) receives a dict per
+    file event ('started', 'progress', 'finished', 'skipped' or 'error')
+    with batch counters and an ETA estimated from the bytes converted so far, counting
+    the finished fraction of files still running.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, per_disk_limit=DEFAULT_PER_DISK_LIMIT, convert=convert_to_mp4):
+        self.convert = convert
+        self._scheduler = DownloadScheduler(max_workers, per_disk_limit, key=disk_key)
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Start no further files; conversions already running finish"""
+        self._scheduler.cancel()
+
+    def run(self, files, on_progress=None):
+        """Convert files; returns [(path, success, message), ...] in input order"""
+        files = list(files)
+        sizes = [_file_size(f) for f in files]
+        state = {'completed': 0, 'skipped': 0, 'failed': 0, 'done_bytes': 0, 'total_bytes': sum(sizes)}
+        partial = {}
+        start = time.monotonic()
+
+        def report(index, status, message=None, file_progress=None):
+            if on_progress is None:
+                return
+            with self._lock:
+                done_bytes = state['done_bytes'] + sum(partial.values())
+                elapsed = time.monotonic() - start
+                eta = None
+                if done_bytes and elapsed > 0:
+                    eta = max(0.0, state['total_bytes'] - done_bytes) * elapsed / done_bytes
+                d = {
+                    'status': status,
+                    'filename': files[index],
+                    'message': message,
+                    'completed': state['completed'],
+                    'skipped': state['skipped'],
+                    'failed': state['failed'],
+                    'total': len(files),
+                    'eta': eta,
+                }
+            if file_progress:
+                d['percent'] = file_progress.get('percent')
+                d['speed'] = file_progress.get('speed')
+            on_progress(d)
+
+        def file_progress(index, p):
+            if p.get('percent') is not None:
+                with self._lock:
+                    partial[index] = sizes[index] * p['percent'] / 100
+            report(index, 'progress', file_progress=p)
+
+        def task(index, path):
+            report(index, 'started')
+            return self.convert(path, on_progress=lambda p: file_progress(index, p))
+
+        def on_result(index, result):
+            ok, message = result if isinstance(result, tuple) else (False, str(result))
+            skipped = ok and message == UP_TO_DATE
+            with self._lock:
+                state['completed' if ok else 'failed'] += 1
+                if skipped:
+                    state['skipped'] += 1
+                    # Skipped files took no real time; keep them out of the throughput estimate
+                    state['total_bytes'] -= sizes[index]
+                else:
+                    state['done_bytes'] += sizes[index]
+                partial.pop(index, None)
+            if not ok:
+                logging.error(f"Convert failed for {files[index]}: {message}")
+            report(index, 'skipped' if skipped else 'finished' if ok else 'error', message)
+
+        results = dict(self._scheduler.run(list(enumerate(files)), task, on_result))
+        out = []
+        for index, path in enumerate(files):
+            result = results.get(index)
+            if result is None:
+                out.append((path, False, "Cancelled"))
+            elif isinstance(result, tuple):
+                out.append((path, result[0], result[1]))
+            else:
+                out.append((path, False, str(result)))
+        return out
+
+
+def summarize(results):
+    """Result message for a finished batch: converted, up-to-date and failed counts"""
+    skipped = sum(1 for _, ok, message in results if ok and message == UP_TO_DATE)
+    failed = sum(1 for _, ok, _ in results if not ok)
+    message = f"Converted: {len(results) - skipped - failed}, Up to date: {skipped}, Failed: {failed}"
+    if failed:
+        message += "\nCheck log for details."
+    return message
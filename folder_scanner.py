@@ -0,0 +1,173 @@
+# folder_scanner.py
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import deque
+
+from app_paths import user_cache_dir
+
+VIDEO_EXTENSIONS = frozenset({'.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm'})
+DEFAULT_WORKERS = 8             # directory listing is latency-bound, not CPU-bound
+DEFAULT_BATCH_SIZE = 500
+BATCH_INTERVAL = 0.25           # flush partial batches at least this often (seconds)
+
+
+def is_video(name):
+    return os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+
+
+class DirectoryIndex:
+    """Persistent per-root record of each directory's mtime, video files and subdirectories.
+
+    A directory's mtime changes when entries are added, removed or renamed
+    in it, so an unchanged mtime means its cached listing is still valid and
+    the directory does not need to be listed again.
+    """
+
+    def __init__(self, root, directory=None):
+        self.root = os.path.abspath(root)
+        name = hashlib.sha256(os.path.normcase(self.root).encode('utf-8')).hexdigest()[:32]
+        self.path = os.path.join(directory or user_cache_dir('scan'), f"{name}.json")
+        self._lock = threading.Lock()
+        self._dirs = {}
+        self._seen = set()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('root') == self.root:
+                self._dirs = data.get('dirs', {})
+        except (OSError, ValueError):
+            pass
+
+    def lookup(self, path, mtime_ns):
+        """Cached (files, subdirs) for a directory whose mtime is unchanged, else None"""
+        with self._lock:
+            self._seen.add(path)
+            record = self._dirs.get(path)
+        if record and record.get('mtime') == mtime_ns:
+            return record['files'], record['dirs']
+        return None
+
+    def store(self, path, mtime_ns, files, dirs):
+        with self._lock:
+            self._seen.add(path)
+            self._dirs[path] = {'mtime': mtime_ns, 'files': files, 'dirs': dirs}
+
+    def save(self):
+        """Write the index, dropping directories that no longer exist under the root"""
+        with self._lock:
+            dirs = {path: record for path, record in self._dirs.items() if path in self._seen}
+        tmp = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'root': self.root, 'dirs': dirs}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.warning(f"Could not save scan index for {self.root}: {e}")
+
+
+class FolderScanner:
+    """List video files under a folder with os.scandir, walking subtrees on several threads.
+
+    on_batch(paths) is called from the scanning threads with up to
+    batch_size paths at a time as they are found, and at least every
+    BATCH_INTERVAL seconds while a thread has any. With use_index, directories
+    whose mtime is unchanged since the last scan of the same root are not
+    listed again.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, use_index=True, index_dir=None):
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.use_index = use_index
+        self.index_dir = index_dir
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _list_dir(self, path):
+        files, dirs = [], []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.name)
+                    elif is_video(entry.name):
+                        files.append(entry.name)
+                except OSError:
+                    continue
+        return files, dirs
+
+    def _visit(self, path, index):
+        """(video files, subdirectories) of one directory, from the index when unchanged"""
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = index.lookup(path, mtime_ns) if index else None
+        if cached is not None:
+            return cached
+        files, dirs = self._list_dir(path)
+        if index:
+            index.store(path, mtime_ns, files, dirs)
+        return files, dirs
+
+    def scan(self, root, on_batch=None):
+        """Return every video file under root, sorted"""
+        root = os.path.abspath(root)
+        index = DirectoryIndex(root, self.index_dir) if self.use_index else None
+        queue = deque([root])
+        cond = threading.Condition()
+        state = {'busy': 0}
+        found = []
+
+        def flush(batch):
+            if batch:
+                with cond:
+                    found.extend(batch)
+                if on_batch:
+                    on_batch(batch)
+
+        def worker():
+            batch = []
+            last_flush = time.monotonic()
+            while True:
+                with cond:
+                    while not queue and state['busy'] and not self._cancelled:
+                        cond.wait()
+                    if not queue or self._cancelled:
+                        cond.notify_all()
+                        break
+                    path = queue.popleft()
+                    state['busy'] += 1
+                try:
+                    files, dirs = self._visit(path, index)
+                except OSError as e:
+                    logging.info(f"Skipping {path}: {e}")
+                    files, dirs = [], []
+                batch.extend(os.path.join(path, name) for name in files)
+                with cond:
+                    queue.extend(os.path.join(path, name) for name in dirs)
+                    state['busy'] -= 1
+                    cond.notify_all()
+                if len(batch) >= self.batch_size or (batch and time.monotonic() - last_flush >= BATCH_INTERVAL):
+                    flush(batch)
+                    batch = []
+                    last_flush = time.monotonic()
+            flush(batch)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if index and not self._cancelled:
+            index.save()
+        found.sort()
+        return found
+
+
+def find_video_files(folder_path, on_batch=None):
+    """Video files under folder_path (sorted), using the persistent directory index"""
+    return FolderScanner().scan(folder_path, on_batch)
@@ -0,0 +1,65 @@
+# http_client.py
+import os
+import shutil
+import threading
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36'
+DEFAULT_HEADERS = {'User-Agent': USER_AGENT}
+POOL_SIZE = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide requests.Session: pooled keep-alive connections and shared headers"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+    return _session
+
+
+def download_file(url, dest, timeout=60, chunk_size=1024 * 1024, resume=False):
+    """Stream url to dest through the shared session.
+
+    With resume, data goes to dest + '.part' first and an interrupted
+    download continues from where it stopped with a Range request (servers
+    that ignore the range send the whole file again). dest only appears
+    once the download is complete.
+    """
+    target = dest + '.part' if resume else dest
+    offset = os.path.getsize(target) if resume and os.path.exists(target) else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+    try:
+        session = get_session()
+    except ImportError:
+        # requests is installed by setup_helper; plain urllib until then
+        import urllib.error
+        import urllib.request
+        req = urllib.request.Request(url, headers={**DEFAULT_HEADERS, **headers})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp, \
+                    open(target, 'ab' if resp.status == 206 else 'wb') as f:
+                shutil.copyfileobj(resp, f, chunk_size)
+        except urllib.error.HTTPError as e:
+            if e.code != 416:
+                raise
+    else:
+        with session.get(url, stream=True, timeout=timeout, headers=headers) as resp:
+            # 416: the range starts at the end of the file, so the part is already complete
+            if resp.status_code != 416:
+                resp.raise_for_status()
+                with open(target, 'ab' if resp.status_code == 206 else 'wb') as f:
+                    for chunk in resp.iter_content(chunk_size):
+                        f.write(chunk)
+    if resume:
+        os.replace(target, dest)
+    return dest
@@ -3,17 +3,21 @@ import os
 import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from setup_helper import full_setup
+from setup_helper import TK_PACKAGES, start_background_setup
 # import cc_download.main as cc
 
-full_setup()  # Ensure environment is ready
-
-from yt_dlp import YoutubeDL
 from datetime import datetime
 import logging
-import re
-import requests
-import subprocess
+import metadata_cache
+from archive_index import ARCHIVE_FILENAME, get_archive_index, plan_downloads
+from download_engine import MAX_ATTEMPTS, DownloadEngine, list_entries
+from folder_scanner import find_video_files
+from output_plan import AUDIO_TARGETS, DEFAULT_AUDIO_TARGET, DEFAULT_CONTAINER, VIDEO_CONTAINERS
+from ffmpeg_tools import ConversionPool, format_progress, summarize
+from progress import format_batch, format_snapshot
+from scheduler import DEFAULT_MAX_WORKERS
+from http_client import USER_AGENT
+from url_resolver import resolve_final_url
 # import re
 
 
@@ -37,7 +41,7 @@ DEFAULT_DOWNLOAD_DIR = check_os("YouTube_Downloads")
 DOWNLOAD_DIR = DEFAULT_DOWNLOAD_DIR
 AUDIO_COPY_DIR = os.path.join(DOWNLOAD_DIR, "audio_only")
 LOG_FILE = check_os("youtube_downloader.log")
-ARCHIVE_FILE = os.path.join(DOWNLOAD_DIR, 'downloaded_videos.txt')
+ARCHIVE_FILE = os.path.join(DOWNLOAD_DIR, ARCHIVE_FILENAME)
 
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 os.makedirs(AUDIO_COPY_DIR, exist_ok=True)
@@ -96,48 +100,25 @@ cookies_path = None   # optional cookies file for sites like Facebook
 convert_selected_btn = None
 convert_all_btn = None
 
-def resolve_final_url(input_url: str) -> str:
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
-        }
-        resp = requests.get(input_url, headers=headers, allow_redirects=True, timeout=15)
-        if resp.url:
-            return resp.url
-        return input_url
-    except Exception:
-        return input_url
-
-# Utility: scan for video files (used by Scan Folder)
-def find_video_files(folder_path: str):
-    video_extensions = ['.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm']
-    matches = []
-    for dirpath, dirnames, filenames in os.walk(folder_path):
-        for filename in filenames:
-            if any(filename.lower().endswith(ext) for ext in video_extensions):
-                matches.append(os.path.join(dirpath, filename))
-    return matches
-
-# Utility: convert a single file to MP4 via ffmpeg (stream copy)
-def convert_to_mp4(input_file: str):
-    base, ext = os.path.splitext(input_file)
-    output_file = f"{base}.mp4"
-    if os.path.normpath(input_file).lower() == os.path.normpath(output_file).lower():
-        return True, "Already MP4"
-    cmd = ['ffmpeg', '-y', '-i', input_file, '-c:v', 'copy', '-c:a', 'copy', output_file]
-    try:
-        proc = subprocess.run(cmd, check=True, text=True, capture_output=True, encoding='utf-8')
-        return True, output_file
-    except FileNotFoundError:
-        return False, "FFmpeg not found. Install and add to PATH."
-    except subprocess.CalledProcessError as e:
-        return False, e.stderr or str(e)
-    except Exception as e:
-        return False, str(e)
 success_count = 0
 failure_count = 0
 
 # --- Functions ---
+def on_main_loop(func, *args):
+    """Call func on the Tk main loop from a worker thread and wait for its result (e.g. a dialog answer)"""
+    done = threading.Event()
+    result = {}
+
+    def _call():
+        try:
+            result['value'] = func(*args)
+        finally:
+            done.set()
+    root.after(0, _call)
+    done.wait()
+    return result.get('value')
+
+
 def fetch_videos():
     global playlist_entries
     playlist_entries = []
@@ -158,38 +139,14 @@ def fetch_videos():
         messagebox.showwarning("Input Error", "Please enter a playlist URL.")
         return
 
-    ydl_opts = {
-        'extract_flat': True,
-        'quiet': True,
-        'skip_download': True,
-        'http_headers': {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
-            'Referer': url,
-        },
-    }
-    if cookies_path:
-        ydl_opts['cookiefile'] = cookies_path
     try:
-        with YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            # Handle playlists and generic post pages with multiple entries
-            if isinstance(info, dict) and 'entries' in info and info['entries'] is not None:
-                entries = info['entries']
-                for i, entry in enumerate(entries):
-                    if not isinstance(entry, dict):
-                        continue
-                    title = entry.get('title') or entry.get('id', 'Unknown')
-                    playlist_entries.append(entry)
-                    video_listbox.insert(tk.END, f"{i+1:03d}. {title}")
-                if not entries:
-                    messagebox.showerror("No Media", "No videos found at the provided URL.")
-            elif isinstance(info, dict):
-                # Single media item
-                title = info.get('title') or info.get('id', 'Unknown')
-                playlist_entries.append(info)
-                video_listbox.insert(tk.END, f"001. {title}")
-            else:
-                messagebox.showerror("No Media", "No downloadable media found at the provided URL.")
+        # Same flat extraction (and metadata cache) as the download engine and the CLI
+        playlist_entries = list_entries(url, cookies_path=cookies_path, bypass_cache=refresh_var.get())
+        # One insert call for the whole batch instead of one per row
+        if playlist_entries:
+            video_listbox.insert(tk.END, *(f"{i:03d}. {record.title}" for i, record in enumerate(playlist_entries, start=1)))
+        else:
+            messagebox.showerror("No Media", "No videos found at the provided URL.")
     except Exception as e:
         messagebox.showerror("Error", f"Could not fetch info from URL. If this is Facebook, try loading cookies.txt and retry.\n\n{e}")
 
@@ -202,12 +159,16 @@ def update_quality_options(*args):
         q_combo.pack_configure(pady=(5, 10))
         fmt_btn.pack_configure(pady=(0, 5))
         captions_lang_combo_inline.grid_remove()
+        audio_format_combo_inline.grid_remove()
+        container_combo_inline.grid()
     elif mode == 'Audio':
         q_combo['values'] = audio_qualities
         q_combo.current(0)
         q_combo.pack_configure(pady=(5, 10))
         fmt_btn.pack_configure(pady=(0, 5))
         captions_lang_combo_inline.grid_remove()
+        audio_format_combo_inline.grid()
+        container_combo_inline.grid_remove()
     else:
         # Captions mode
         q_combo['values'] = []
@@ -218,6 +179,8 @@ def update_quality_options(*args):
         q_combo.pack_forget()
         fmt_btn.pack_forget()
         captions_lang_combo_inline.grid()
+        audio_format_combo_inline.grid_remove()
+        container_combo_inline.grid_remove()
 
 
 def load_formats_for_selection():
@@ -227,11 +190,13 @@ def load_formats_for_selection():
         return
     # Use the first selected index to discover formats
     idx = selected[0]
-    url = url_entry.get().strip()
-    url = resolve_final_url(url)
+    # Load formats of the selected entry itself; the result is cached and reused by its download
+    item_url = playlist_entries[idx].url if idx < len(playlist_entries) else None
+    url = item_url or resolve_final_url(url_entry.get().strip())
     if not url:
         messagebox.showwarning("Input Error", "Please enter a URL first.")
         return
+    bypass = refresh_var.get()
 
     progress_label.config(text="Loading formats...")
     def _load():
@@ -239,16 +204,16 @@ def load_formats_for_selection():
         try:
             base_opts = {
                 'quiet': True,
-                'playlist_items': str(idx + 1),
                 'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
+                    'User-Agent': USER_AGENT,
                     'Referer': url,
                 }
             }
+            if not item_url:
+                base_opts['playlist_items'] = str(idx + 1)
             if cookies_path:
                 base_opts['cookiefile'] = cookies_path
-            with YoutubeDL(base_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+            info = metadata_cache.extract_info(url, base_opts, bypass=bypass, ttl=metadata_cache.FORMATS_TTL)
         except Exception as e:
             logging.error(f"Format load failed: {e}")
             messagebox.showerror("Error", f"Failed to load formats:\n{e}")
@@ -316,159 +281,97 @@ def download_selected():
             quality = selected_label
     selected_indices = [i for i in selected]
 
+    # Plan the batch against the archive before any network work starts
+    redownload = set()
+    if mode in ('Video', 'Audio') and playlist_entries:
+        pending, archived = plan_downloads(playlist_entries, selected_indices, get_archive_index(ARCHIVE_FILE))
+        for i in archived:
+            video_listbox.itemconfig(i, fg='gray')
+        if archived:
+            again = messagebox.askyesno(
+                "Already downloaded",
+                f"{len(archived)} of {len(selected_indices)} selected item(s) are already downloaded. Download them again?"
+            )
+            if again:
+                redownload = set(archived)
+            else:
+                selected_indices = pending
+        if not selected_indices:
+            messagebox.showinfo("Nothing to do", "All selected items are already downloaded.")
+            return
+
     progress_label.config(text="Starting download...")
 
-    def progress_hook(d):
-        if d['status'] == 'downloading':
-            percent = d.get('_percent_str', '').strip()
-            progress_label.config(text=f"Downloading: {percent}")
-            progress_bar.step(1)
-        elif d['status'] == 'finished':
-            progress_label.config(text=f"Finished: {d.get('filename')}")
-            progress_bar['value'] = 100
-
-    def is_in_archive(video_id: str) -> bool:
-        try:
-            if not os.path.exists(ARCHIVE_FILE):
-                return False
-            with open(ARCHIVE_FILE, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                return video_id in content
-        except Exception:
-            return False
-        # ydl_opts['format'] = 'bestvideo+bestaudio/best'
+    # Widgets are only touched on the Tk main loop; the download thread schedules updates with root.after
+    def set_status(text, value=None):
+        def _apply():
+            progress_label.config(text=text)
+            if value is not None:
+                progress_bar['value'] = value
+        root.after(0, _apply)
+
+    def set_counts(succeeded, failed, total_items):
+        text = f"Downloaded: {succeeded}/{total_items} | Errors: {failed}"
+        root.after(0, lambda: counts_label.config(text=text))
+
+    # The bar follows the bytes of the whole selection, not the current item
+    last_item = {'text': ''}
+
+    def show_progress(snapshots):
+        last_item['text'] = format_snapshot(snapshots[-1])
+
+    def show_batch(summary):
+        set_status(f"{last_item['text']}\n{format_batch(summary)}".lstrip('\n'), summary['percent'])
+
+    # Items download in parallel; one retry question at a time, asked on the main loop
+    retry_lock = threading.Lock()
+
+    def ask_retry(label, title, attempts):
+        with retry_lock:
+            return on_main_loop(messagebox.askyesno, "Retry more?", f"'{title}' failed {attempts} times. Try {MAX_ATTEMPTS} more attempts?")
+
+    # The engine takes 1-based playlist positions; the listbox is 0-based
+    engine = DownloadEngine(
+        url=url,
+        download_dir=DOWNLOAD_DIR,
+        mode=mode,
+        selected_indices=[i + 1 for i in selected_indices],
+        quality_selector=quality,
+        cookies_path=cookies_path,
+        captions_lang=captions_lang_var.get().strip() or 'en',
+        audio_target=audio_format_var.get(),
+        container=container_var.get(),
+        entries=list(playlist_entries),
+        redownload=[i + 1 for i in redownload],
+        playlist_subdirs=True,
+        on_status=set_status,
+        on_progress=show_progress,
+        on_batch=show_batch,
+        on_counts=set_counts,
+        on_retry=ask_retry,
+        max_parallel=parallel_var.get(),
+    )
 
     def run_download():
-        global success_count, failure_count, DOWNLOAD_DIR, AUDIO_COPY_DIR, ARCHIVE_FILE
-        success_count = 0
-        failure_count = 0
-        total_items = len(selected_indices)
-        counts_label.config(text=f"Downloaded: {success_count}/{total_items} | Errors: {failure_count}")
-
-        # Captions mode: use a streamlined captions flow
+        global success_count, failure_count
         if mode == 'Captions':
-            lang = captions_lang_var.get().strip() or 'en'
-            target_dir = os.path.join(DOWNLOAD_DIR, 'captions')
-            os.makedirs(target_dir, exist_ok=True)
             try:
-                opts = {
-                    'skip_download': True,
-                    'writeautomaticsub': True,
-                    'writesubtitles': True,
-                    'subtitleslangs': [lang],
-                    'outtmpl': os.path.join(target_dir, '%(title)s.%(ext)s'),
-                    'subtitle_format': 'vtt',
-                    'quiet': False,
-                    'ignoreerrors': True,
-                }
-                with YoutubeDL(opts) as ydl:
-                    ydl.download([url])
-                messagebox.showinfo("Captions", f"Captions downloaded to:\n{target_dir}")
+                target_dir = engine.download_captions()
+                root.after(0, lambda: messagebox.showinfo("Captions", f"Captions downloaded to:\n{target_dir}"))
             except Exception as e:
                 logging.error(f"Captions download failed: {e}")
-                messagebox.showerror("Captions Error", f"Failed to download captions:\n{e}")
+                message = f"Failed to download captions:\n{e}"
+                root.after(0, lambda: messagebox.showerror("Captions Error", message))
             return
 
-        for offset, idx in enumerate(selected_indices, start=1):
-            try:
-                entry = playlist_entries[idx]
-            except Exception:
-                failure_count += 1
-                counts_label.config(text=f"Downloaded: {success_count}/{total_items} | Errors: {failure_count}")
-                continue
-
-            title = entry.get('title', 'Unknown Title')
-            video_id = entry.get('id') or ''
-
-            # Duplicate confirmation using archive
-            use_archive = True
-            if video_id and is_in_archive(video_id):
-                resp = messagebox.askyesno("Already downloaded", f"'{title}' seems already downloaded. Download again?")
-                if not resp:
-                    counts_label.config(text=f"Downloaded: {success_count}/{total_items} | Errors: {failure_count}")
-                    continue
-                use_archive = False
-
-            # Build per-item options and ensure target subfolder exists (for non-playlist posts too)
-            raw_subdir = entry.get('playlist') or 'NA'
-            safe_subdir = re.sub(r'[\\/:*?"<>|]+', '_', str(raw_subdir)).strip() or 'NA'
-            target_dir = os.path.join(DOWNLOAD_DIR, safe_subdir)
-            os.makedirs(target_dir, exist_ok=True)
-
-            ydl_opts_item = {
-                'format': quality,
-                'outtmpl': '%(playlist_index|NA)s - %(title)s.%(ext)s',
-                'paths': {
-                    'home': target_dir,
-                    'temp': target_dir,
-                },
-                'ignoreerrors': False,
-                'progress_hooks': [progress_hook],
-                'playlist_items': str(idx + 1),
-                'retries': 10,
-                'fragment_retries': 10,
-                'concurrent_fragment_downloads': 3,
-                'windowsfilenames': True,
-                'restrictfilenames': True,
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
-                    'Referer': url,
-                }
-            }
-            if cookies_path:
-                ydl_opts_item['cookiefile'] = cookies_path
-            if use_archive:
-                ydl_opts_item['download_archive'] = ARCHIVE_FILE
-
-            if mode == 'Audio':
-                ydl_opts_item['extractaudio'] = True
-                ydl_opts_item['postprocessors'] = [
-                    {
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }
-                ]
-            else:  # Video
-                ydl_opts_item['postprocessors'] = [
-                    {
-                        'key': 'FFmpegVideoRemuxer',
-                        'preferedformat': 'mkv'
-                    }
-                ]
-
-            attempts = 0
-            local_max = 5
-            while True:
-                try:
-                    progress_bar['value'] = 0
-                    progress_label.config(text=f"Starting: {title} ({offset}/{total_items})")
-                    with YoutubeDL(ydl_opts_item) as ydl:
-                        ydl.download([url])
-                    success_count += 1
-                    counts_label.config(text=f"Downloaded: {success_count}/{total_items} | Errors: {failure_count}")
-                    break
-                except Exception as e:
-                    attempts += 1
-                    logging.error(f"Download failed for '{title}' attempt {attempts}: {e}")
-                    progress_label.config(text=f"Error: {title} (attempt {attempts}/{local_max})")
-                    if attempts >= local_max:
-                        retry_more = messagebox.askyesno(
-                            "Retry more?",
-                            f"'{title}' failed {local_max} times. Try {local_max} more attempts?"
-                        )
-                        if retry_more:
-                            attempts = 0
-                            continue
-                        else:
-                            failure_count += 1
-                            counts_label.config(text=f"Downloaded: {success_count}/{total_items} | Errors: {failure_count}")
-                            break
-
+        engine.run()
+        success_count, failure_count = engine.success_count, engine.failure_count
         if failure_count == 0:
-            messagebox.showinfo("Done", f"All {success_count} items downloaded successfully.")
+            message = f"All {success_count} items downloaded successfully."
+            root.after(0, lambda: messagebox.showinfo("Done", message))
         else:
-            messagebox.showwarning("Done with errors", f"Downloaded {success_count} items with {failure_count} error(s). Check logs.")
+            message = f"Downloaded {success_count} items with {failure_count} error(s). Check logs."
+            root.after(0, lambda: messagebox.showwarning("Done with errors", message))
 
     threading.Thread(target=run_download, daemon=True).start()
 
@@ -478,7 +381,9 @@ url_entry = tk.Entry(content, width=80)
 url_entry.pack()
 
 fetch_btn = tk.Button(content, text="Fetch Playlist", command=fetch_videos)
-fetch_btn.pack(pady=(5, 10))
+fetch_btn.pack(pady=(5, 0))
+refresh_var = tk.BooleanVar(value=False)
+tk.Checkbutton(content, text="Refresh (ignore cached metadata)", variable=refresh_var).pack(pady=(0, 10))
 
 frame = tk.Frame(content)
 frame.pack()
@@ -512,6 +417,17 @@ captions_lang_combo_inline = ttk.Combobox(frame, values=["en", "ar"], state="rea
 captions_lang_combo_inline.grid(row=0, column=4, padx=(10,0))
 captions_lang_combo_inline.grid_remove()
 
+# Audio output format (shown only when Audio is selected, in the captions combo's cell); auto never re-encodes
+audio_format_var = tk.StringVar(value=DEFAULT_AUDIO_TARGET)
+audio_format_combo_inline = ttk.Combobox(frame, values=list(AUDIO_TARGETS), state="readonly", width=8, textvariable=audio_format_var)
+audio_format_combo_inline.grid(row=0, column=4, padx=(10,0))
+audio_format_combo_inline.grid_remove()
+
+# Video container (shown in Video mode, in the same cell); downloads are merged straight into it
+container_var = tk.StringVar(value=DEFAULT_CONTAINER)
+container_combo_inline = ttk.Combobox(frame, values=list(VIDEO_CONTAINERS), state="readonly", width=8, textvariable=container_var)
+container_combo_inline.grid(row=0, column=4, padx=(10,0))
+
 video_listbox = tk.Listbox(content, selectmode=tk.MULTIPLE, width=80, height=12)
 video_listbox.pack()
 
@@ -533,7 +449,7 @@ def choose_folder():
     if chosen:
         DOWNLOAD_DIR = chosen
         AUDIO_COPY_DIR = os.path.join(DOWNLOAD_DIR, "audio_only")
-        ARCHIVE_FILE = os.path.join(DOWNLOAD_DIR, 'downloaded_videos.txt')
+        ARCHIVE_FILE = os.path.join(DOWNLOAD_DIR, ARCHIVE_FILENAME)
         os.makedirs(DOWNLOAD_DIR, exist_ok=True)
         os.makedirs(AUDIO_COPY_DIR, exist_ok=True)
         folder_label.config(text=f"Folder: {DOWNLOAD_DIR}")
@@ -543,6 +459,9 @@ folder_frame.pack(pady=(0, 5))
 tk.Button(folder_frame, text="Choose Folder", command=choose_folder).grid(row=0, column=0, padx=(0, 10))
 folder_label = tk.Label(folder_frame, text=f"Folder: {DOWNLOAD_DIR}")
 folder_label.grid(row=0, column=1)
+tk.Label(folder_frame, text="Parallel:").grid(row=0, column=2, padx=(10, 0))
+parallel_var = tk.IntVar(value=DEFAULT_MAX_WORKERS)
+tk.Spinbox(folder_frame, from_=1, to=8, width=3, state="readonly", textvariable=parallel_var).grid(row=0, column=3)
 
 counts_label = tk.Label(content, text="Downloaded: 0/0 | Errors: 0")
 counts_label.pack(pady=(0, 5))
@@ -563,25 +482,23 @@ cookies_btn = tk.Button(content, text="Load Cookies.txt (optional)", command=loa
 cookies_btn.pack(pady=(0, 5))
 
 # Inline buttons on the right of type options: Convert MKV to MP4 and Scan Folder
+def convert_files_in_background(files, title):
+    """Convert files on a ConversionPool, reporting each file and the batch ETA in the progress label"""
+    def _report(d):
+        root.after(0, lambda: progress_label.config(text=format_progress(d)))
+    def _run():
+        message = summarize(ConversionPool().run(files, _report))
+        root.after(0, lambda: progress_label.config(text=message.splitlines()[0]))
+        root.after(0, lambda: messagebox.showinfo(title, message))
+    progress_label.config(text=f"Converting {len(files)} file(s)...")
+    threading.Thread(target=_run, daemon=True).start()
+
 def convert_mkv_button():
     paths = filedialog.askopenfilenames(title="Choose MKV/Video files",
                                         filetypes=[("Video Files", "*.mkv;*.mp4;*.avi;*.mov;*.wmv;*.flv;*.webm"), ("All Files", "*.*")])
     if not paths:
         return
-    def _run():
-        ok, fail = 0, 0
-        for f in paths:
-            success, msg = convert_to_mp4(f)
-            if success:
-                ok += 1
-            else:
-                fail += 1
-                logging.error(f"Convert failed for {f}: {msg}")
-        message = f"Converted: {ok}, Failed: {fail}"
-        if fail:
-            message += "\nCheck log for details."
-        messagebox.showinfo("Convert", message)
-    threading.Thread(target=_run, daemon=True).start()
+    convert_files_in_background(list(paths), "Convert")
 
 def scan_folder_button():
     path = filedialog.askdirectory(initialdir=DOWNLOAD_DIR, title="Choose folder to scan for videos")
@@ -589,11 +506,10 @@ def scan_folder_button():
         return
     video_listbox.delete(0, tk.END)
     def _scan():
-        files = find_video_files(path)
-        for p in files:
-            video_listbox.insert(tk.END, p)
+        # Batches arrive from the scanner threads; Tk widgets are only touched from the main loop
+        files = find_video_files(path, lambda batch: root.after(0, lambda: video_listbox.insert(tk.END, *batch)))
         if not files:
-            messagebox.showinfo("Scan", "No videos found in the selected folder.")
+            root.after(0, lambda: messagebox.showinfo("Scan", "No videos found in the selected folder."))
     def _post():
         try:
             start_btn.pack_forget()
@@ -620,43 +536,21 @@ def convert_selected_action_inline():
     if not sel:
         messagebox.showwarning("Convert", "Select one or more files to convert.")
         return
-    files = [video_listbox.get(i) for i in sel]
-    def _run():
-        ok, fail = 0, 0
-        for f in files:
-            success, msg = convert_to_mp4(f)
-            if success:
-                ok += 1
-            else:
-                fail += 1
-                logging.error(f"Convert failed for {f}: {msg}")
-        message = f"Converted: {ok}, Failed: {fail}"
-        if fail:
-            message += "\nCheck log for details."
-        messagebox.showinfo("Convert Selected", message)
-    threading.Thread(target=_run, daemon=True).start()
+    convert_files_in_background([video_listbox.get(i) for i in sel], "Convert Selected")
 
 def convert_all_action_inline():
     count = video_listbox.size()
     if count == 0:
         messagebox.showwarning("Convert", "No files to convert. Run Scan first.")
         return
-    files = [video_listbox.get(i) for i in range(count)]
-    def _run():
-        ok, fail = 0, 0
-        for f in files:
-            success, msg = convert_to_mp4(f)
-            if success:
-                ok += 1
-            else:
-                fail += 1
-                logging.error(f"Convert failed for {f}: {msg}")
-        message = f"Converted: {ok}, Failed: {fail}"
-        if fail:
-            message += "\nCheck log for details."
-        messagebox.showinfo("Convert All", message)
-    threading.Thread(target=_run, daemon=True).start()
+    convert_files_in_background([video_listbox.get(i) for i in range(count)], "Convert All")
 
 ## Removed separate Captions and Converter frames; integrated into main controls
 
+def on_setup_done(error):
+    if error:
+        root.after(0, lambda: messagebox.showwarning("Setup", f"Environment setup failed, some features may not work:\n{error}"))
+
+# The window shows first; packages and FFmpeg are checked in the background
+root.after(0, lambda: start_background_setup(TK_PACKAGES, on_done=on_setup_done))
 root.mainloop()
\ No newline at end of file
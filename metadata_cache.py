@@ -0,0 +1,182 @@
+# metadata_cache.py
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from app_paths import user_cache_dir
+
+DEFAULT_TTL = 60 * 60           # playlists and flat listings
+FORMATS_TTL = 30 * 60           # full extractions; format URLs expire
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Options that change what extract_info returns; everything else is ignored in the key
+KEY_OPTIONS = ('extract_flat', 'playlist_items', 'noplaylist', 'cookiefile')
+TRACKING_PARAMS = {'si', 'fbclid', 'igshid', 'feature'}
+
+
+def normalize_url(url):
+    """Canonical form of a URL for cache keys: no fragment, no tracking params, sorted query"""
+    try:
+        parts = urlsplit(url.strip())
+    except (AttributeError, ValueError):
+        return url
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k not in TRACKING_PARAMS and not k.startswith('utm_'))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+
+class MetadataCache:
+    """Content-addressed extract_info cache, one JSON file per key, with TTL and LRU eviction"""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, default_ttl=DEFAULT_TTL):
+        self.directory = directory or user_cache_dir('metadata')
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, url, opts=None):
+        opts = opts or {}
+        material = {
+            'url': normalize_url(url),
+            'opts': {k: opts[k] for k in KEY_OPTIONS if opts.get(k)},
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, url, opts=None, ttl=None):
+        path = self._path(self.key(url, opts))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        ttl = self.default_ttl if ttl is None else ttl
+        if time.time() - record.get('created', 0) > ttl:
+            return None
+        try:
+            os.utime(path)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+        return record.get('info')
+
+    def put(self, url, opts, info):
+        path = self._path(self.key(url, opts))
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'url': url, 'created': time.time(), 'info': info}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"Could not cache metadata for {url}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def invalidate(self, url, opts=None):
+        try:
+            os.remove(self._path(self.key(url, opts)))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            files = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.json'):
+                    st = entry.stat()
+                    files.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+            files.sort()
+            while files and total > self.max_bytes:
+                _, size, path = files.pop(0)
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+_default_cache = None
+
+
+def get_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = MetadataCache()
+    return _default_cache
+
+
+def extract_info(url, ydl_opts, *, bypass=False, ttl=None, cache=None):
+    """YoutubeDL.extract_info(url, download=False) served from the cache when fresh.
+
+    bypass skips the lookup but still stores the new result.
+    """
+    cache = cache or get_cache()
+    if not bypass:
+        info = cache.get(url, ydl_opts, ttl)
+        if info is not None:
+            return info
+    from yt_dlp import YoutubeDL
+    with YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+        if info is not None:
+            info = ydl.sanitize_info(info)
+    if info is not None:
+        cache.put(url, ydl_opts, info)
+    return info
+
+
+# HTTP statuses that mean a cached format URL has expired
+EXPIRED_STATUSES = (403, 410)
+
+
+def _cached_info_unusable(error):
+    """True when error comes from stale cached info (extractor failure or an expired format URL)"""
+    from yt_dlp.utils import DownloadError, ExtractorError
+    if isinstance(error, DownloadError) and error.exc_info:
+        error = error.exc_info[1]
+    if isinstance(error, ExtractorError):
+        return True
+    # yt-dlp's HTTPError has .status; the urllib one in older releases has .code
+    status = getattr(error, 'status', None) or getattr(error, 'code', None)
+    return status in EXPIRED_STATUSES
+
+
+def download(ydl, url, *, cache=None):
+    """ydl.download([url]), reusing a fresh full extraction (e.g. from Load Formats) when cached.
+
+    Only an extractor error or an expired format URL falls back to a fresh
+    extraction; any other failure is raised for the caller's retry logic.
+    """
+    cache = cache or get_cache()
+    info = cache.get(url, ydl.params, ttl=FORMATS_TTL)
+    if isinstance(info, dict) and info.get('formats'):
+        try:
+            ydl.process_ie_result(info, download=True)
+            return
+        except Exception as e:
+            cache.invalidate(url, ydl.params)
+            if not _cached_info_unusable(e):
+                raise
+            logging.info(f"Cached info for {url} not usable, extracting again: {e}")
+    ydl.download([url])
@@ -0,0 +1,66 @@
+# output_plan.py
+"""yt-dlp options (format, sorting, merge target, post-processors) that produce the requested output in one pass."""
+
+# Audio targets, from cheapest to most expensive. 'auto' keeps whatever
+# codec the best audio stream has (AAC -> .m4a, Opus -> .opus) and only
+# copies it out of its container; the others prefer a source stream that
+# already has the target codec so the copy is usually enough, and transcode
+# only when no such stream exists. 'mp3' is the only target that always
+# re-encodes (unless the site serves MP3 itself).
+AUDIO_TARGETS = ('auto', 'm4a', 'opus', 'mp3')
+DEFAULT_AUDIO_TARGET = 'auto'
+MP3_QUALITY = '192'
+
+# Format filters for the audio streams that can be copied into each target
+_AUDIO_SOURCES = {
+    'm4a': 'bestaudio[acodec^=mp4a]',
+    'opus': 'bestaudio[acodec=opus]',
+}
+_AUDIO_FALLBACK = 'bestaudio/best'
+
+
+# Video containers. Merged downloads are written straight into the
+# container by the merger; a remux pass is only left for single-file formats
+# in another container, and yt-dlp skips it when the extension already
+# matches. For MP4, among formats of the best resolution, streams that come
+# in mp4/m4a containers are preferred so they usually merge by plain stream
+# copy; resolution still wins over the container. 'auto' keeps whatever
+# container the download comes in.
+VIDEO_CONTAINERS = ('mkv', 'mp4', 'auto')
+DEFAULT_CONTAINER = 'mkv'
+
+_CONTAINER_SORT = {
+    'mp4': ['res', 'ext:mp4:m4a'],
+}
+
+
+def audio_plan(target=DEFAULT_AUDIO_TARGET, selector=None):
+    """yt-dlp options for an audio download.
+
+    selector is the user's quality choice; it is kept as the fallback
+    behind the stream that avoids re-encoding.
+    """
+    if target not in AUDIO_TARGETS:
+        raise ValueError(f"Unknown audio format: {target} (expected one of {', '.join(AUDIO_TARGETS)})")
+    fallback = selector or _AUDIO_FALLBACK
+    preferred = _AUDIO_SOURCES.get(target)
+    fmt = f"{preferred}/{fallback}" if preferred else fallback
+    # FFmpegExtractAudio copies the stream when the codec already matches ('best' always matches)
+    pp = {'key': 'FFmpegExtractAudio', 'preferredcodec': 'best' if target == 'auto' else target}
+    if target == 'mp3':
+        pp['preferredquality'] = MP3_QUALITY
+    return {'format': fmt, 'postprocessors': [pp]}
+
+
+def video_plan(container=DEFAULT_CONTAINER, selector=None):
+    """yt-dlp options for a video download written directly into container"""
+    if container not in VIDEO_CONTAINERS:
+        raise ValueError(f"Unknown container: {container} (expected one of {', '.join(VIDEO_CONTAINERS)})")
+    opts = {'format': selector or 'best', 'postprocessors': []}
+    if container == 'auto':
+        return opts
+    opts['merge_output_format'] = container
+    if container in _CONTAINER_SORT:
+        opts['format_sort'] = _CONTAINER_SORT[container]
+    opts['postprocessors'] = [{'key': 'FFmpegVideoRemuxer', 'preferedformat': container}]
+    return opts
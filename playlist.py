@@ -0,0 +1,68 @@
+# playlist.py
+DEFAULT_OUTTMPL = '%(playlist_index|NA)s - %(title)s.%(ext)s'
+
+
+def entry_url(entry):
+    """URL that downloads a single fetched entry directly, without re-extracting its playlist"""
+    if entry is None:
+        return None
+    for key in ('webpage_url', 'url', 'original_url'):
+        value = entry.get(key)
+        if isinstance(value, str) and value.startswith(('http://', 'https://')):
+            return value
+    video_id = entry.get('id')
+    if video_id and (entry.get('ie_key') or entry.get('extractor_key')) == 'Youtube':
+        return f"https://www.youtube.com/watch?v={video_id}"
+    return None
+
+
+def entry_outtmpl(entry, total=0):
+    """Output template keeping the playlist numbering of an entry downloaded on its own"""
+    index = entry.get('playlist_index') if entry is not None else None
+    if not isinstance(index, int):
+        return DEFAULT_OUTTMPL
+    # yt-dlp pads playlist_index to the width of the playlist size
+    width = len(str(entry.get('n_entries') or total or index))
+    return f"{index:0{width}d} - %(title)s.%(ext)s"
+
+
+class PlaylistEntry:
+    """Compact record of a fetched item, keeping only the fields the app uses.
+
+    The full extractor dict is not kept; it is extracted again (through the
+    metadata cache) from url when formats are needed.
+    """
+    __slots__ = ('id', 'title', 'url', 'playlist', 'playlist_index', 'n_entries', 'ie_key')
+
+    def __init__(self, id=None, title=None, url=None, playlist=None, playlist_index=None, n_entries=None, ie_key=None):
+        self.id = id
+        self.title = title
+        self.url = url
+        self.playlist = playlist
+        self.playlist_index = playlist_index
+        self.n_entries = n_entries
+        self.ie_key = ie_key
+
+    @classmethod
+    def from_info(cls, info):
+        """Project a raw (flat) extractor dict onto a record"""
+        return cls(
+            id=info.get('id'),
+            title=info.get('title') or info.get('id') or 'Unknown',
+            url=entry_url(info),
+            playlist=info.get('playlist'),
+            playlist_index=info.get('playlist_index'),
+            n_entries=info.get('n_entries'),
+            ie_key=info.get('ie_key') or info.get('extractor_key'),
+        )
+
+    def get(self, key, default=None):
+        """dict-style access, so helpers accept both records and raw info dicts"""
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__ if getattr(self, key) is not None}
+
+    def __repr__(self):
+        return f"PlaylistEntry(id={self.id!r}, title={self.title!r}, playlist_index={self.playlist_index!r})"
@@ -0,0 +1,194 @@
+# progress.py
+import time
+import threading
+
+DEFAULT_INTERVAL = 0.2          # seconds between UI updates (5 Hz)
+
+
+def snapshot(d, label=''):
+    """Structured view of a yt-dlp progress dict, without yt-dlp's preformatted strings"""
+    total = d.get('total_bytes') or d.get('total_bytes_estimate')
+    downloaded = d.get('downloaded_bytes') or 0
+    percent = None
+    if total:
+        percent = min(100.0, downloaded * 100 / total)
+    elif d.get('fragment_count') and d.get('fragment_index') is not None:
+        percent = min(100.0, d['fragment_index'] * 100 / d['fragment_count'])
+    if d.get('status') == 'finished':
+        percent = 100.0
+    return {
+        'label': label,
+        'status': d.get('status'),
+        'filename': d.get('filename'),
+        'downloaded_bytes': downloaded,
+        'total_bytes': total,
+        'speed': d.get('speed'),
+        'eta': d.get('eta'),
+        'fragment_index': d.get('fragment_index'),
+        'fragment_count': d.get('fragment_count'),
+        'percent': percent,
+    }
+
+
+def format_bytes(n):
+    if n is None:
+        return '?'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(n) < 1024 or unit == 'GiB':
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def format_eta(seconds):
+    """MM:SS or H:MM:SS; '--:--' while unknown"""
+    if seconds is None:
+        return '--:--'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60:02d}:{rest % 60:02d}"
+
+
+def format_snapshot(s):
+    """Status line for one item snapshot"""
+    prefix = f"[{s['label']}] " if s['label'] else ''
+    if s['status'] == 'finished':
+        return f"{prefix}Finished: {s['filename']}"
+    if s['status'] == 'error':
+        return f"{prefix}Error: {s['filename']}"
+    parts = [f"{s['percent']:.1f}%" if s['percent'] is not None else format_bytes(s['downloaded_bytes'])]
+    if s['total_bytes']:
+        parts.append(f"of {format_bytes(s['total_bytes'])}")
+    if s['speed']:
+        parts.append(f"at {format_bytes(s['speed'])}/s")
+    if s['eta'] is not None:
+        parts.append(f"ETA {format_eta(s['eta'])}")
+    if s['fragment_count']:
+        parts.append(f"(frag {s['fragment_index']}/{s['fragment_count']})")
+    return f"{prefix}Downloading: {' '.join(parts)}"
+
+
+class ProgressAggregator:
+    """Coalesce yt-dlp progress callbacks per item and forward them at a fixed rate.
+
+    hook(label) returns a progress hook for one item. Only the latest event
+    of each item is kept; emit(snapshots) is called with the items that
+    changed at most once per interval, and right away when an item finishes
+    or fails so those are never dropped. emit runs on the calling
+    (download) thread.
+    """
+
+    def __init__(self, emit, interval=DEFAULT_INTERVAL):
+        self.emit = emit
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._items = {}
+        self._dirty = {}
+        self._last_emit = 0.0
+
+    def hook(self, label=''):
+        return lambda d: self.update(label, d)
+
+    def update(self, label, d):
+        s = snapshot(d, label)
+        with self._lock:
+            self._items[label] = s
+            self._dirty[label] = s
+            now = time.monotonic()
+            if s['status'] == 'downloading' and now - self._last_emit < self.interval:
+                return
+            changed, self._dirty = list(self._dirty.values()), {}
+            self._last_emit = now
+        self.emit(changed)
+
+    def flush(self):
+        """Send whatever changed since the last emit"""
+        with self._lock:
+            changed, self._dirty = list(self._dirty.values()), {}
+            self._last_emit = time.monotonic()
+        if changed:
+            self.emit(changed)
+
+    def items(self):
+        """Latest snapshot of every item seen so far"""
+        with self._lock:
+            return dict(self._items)
+
+
+class BatchProgress:
+    """Byte-weighted progress of a whole selection, fed with ProgressAggregator snapshots.
+
+    Items that have not started yet are counted at the average size of the
+    items seen so far, so the bar stays determinate from the first item on.
+    An item may download several files (video and audio before a merge);
+    their bytes add up.
+    """
+
+    def __init__(self, total_items):
+        self.total_items = total_items
+        self._lock = threading.Lock()
+        self._items = {}
+
+    def _item(self, label):
+        return self._items.setdefault(label, {'done_bytes': 0, 'current': 0, 'current_total': 0, 'speed': None, 'complete': False})
+
+    def update(self, snapshots):
+        with self._lock:
+            for s in snapshots:
+                item = self._item(s['label'])
+                if s['status'] == 'finished':
+                    item['done_bytes'] += s['downloaded_bytes'] or s['total_bytes'] or item['current']
+                    item['current'] = item['current_total'] = 0
+                    item['speed'] = None
+                elif s['status'] == 'downloading':
+                    item['current'] = s['downloaded_bytes']
+                    item['current_total'] = max(s['total_bytes'] or 0, s['downloaded_bytes'])
+                    item['speed'] = s['speed']
+                else:
+                    item['current'] = item['current_total'] = 0
+                    item['speed'] = None
+
+    def item_done(self, label):
+        """Mark an item finished (downloaded, skipped or failed); it no longer counts as pending"""
+        with self._lock:
+            item = self._item(label)
+            item['complete'] = True
+            item['done_bytes'] += item['current']
+            item['current'] = item['current_total'] = 0
+            item['speed'] = None
+
+    def summary(self):
+        with self._lock:
+            items = list(self._items.values())
+        downloaded = sum(i['done_bytes'] + i['current'] for i in items)
+        expected = [i['done_bytes'] + (i['current'] if i['complete'] else i['current_total']) for i in items]
+        sized = [e for e in expected if e > 0]
+        pending = max(0, self.total_items - len(items))
+        total = sum(expected) + (pending * sum(sized) / len(sized) if sized else 0)
+        done_items = sum(1 for i in items if i['complete'])
+        if total and sized:
+            percent = min(100.0, downloaded * 100 / total)
+        else:
+            percent = done_items * 100 / self.total_items if self.total_items else 0.0
+        speed = sum(i['speed'] for i in items if i['speed'] and not i['complete']) or None
+        eta = max(0.0, (total - downloaded) / speed) if speed and total else None
+        return {
+            'percent': percent,
+            'downloaded_bytes': downloaded,
+            'total_bytes': total or None,
+            'speed': speed,
+            'eta': eta,
+            'items_done': done_items,
+            'total_items': self.total_items,
+        }
+
+
+def format_batch(b):
+    """Short batch line, e.g. 42% - 1.2 GiB of ~2.9 GiB at 5.3 MiB/s - ETA 05:12"""
+    parts = [f"{b['percent']:.0f}%"]
+    if b['total_bytes']:
+        parts.append(f"- {format_bytes(b['downloaded_bytes'])} of ~{format_bytes(b['total_bytes'])}")
+    if b['speed']:
+        parts.append(f"at {format_bytes(b['speed'])}/s")
+    if b['eta'] is not None:
+        parts.append(f"- ETA {format_eta(b['eta'])}")
+    return ' '.join(parts)
@@ -7,16 +7,26 @@ import subprocess
 import tempfile
 import shutil
 import json
-import sqlite3
-import base64
+import time
 from pathlib import Path
 from datetime import datetime
 
-from setup_helper import full_setup
+from setup_helper import install_missing_packages, start_background_setup
 
-full_setup()
+# Needed by the imports below; only a module lookup unless it is missing.
+# The full environment check runs in the background once the window shows.
+install_missing_packages(["PyQt5"])
 
-from yt_dlp import YoutubeDL
+import metadata_cache
+import url_resolver
+from archive_index import ARCHIVE_FILENAME, get_archive_index, plan_downloads
+from download_engine import DownloadEngine
+from ffmpeg_tools import ConversionPool, format_progress, summarize
+from folder_scanner import FolderScanner
+from output_plan import AUDIO_TARGETS, DEFAULT_AUDIO_TARGET, DEFAULT_CONTAINER, VIDEO_CONTAINERS
+from playlist import PlaylistEntry
+from progress import format_batch, format_snapshot
+from scheduler import DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 
@@ -109,6 +119,7 @@ class CookieCollector:
 			temp_db = os.path.join(COOKIES_TEMP_DIR, f'{browser}_cookies.db')
 			shutil.copy2(cookie_db, temp_db)
 			
+			import sqlite3
 			conn = sqlite3.connect(temp_db)
 			cursor = conn.cursor()
 			
@@ -164,6 +175,7 @@ class CookieCollector:
 			return
 		
 		try:
+			import sqlite3
 			conn = sqlite3.connect(cookie_db)
 			cursor = conn.cursor()
 			
@@ -275,8 +287,102 @@ logging.basicConfig(
 )
 
 
+class FetchWorker(QtCore.QObject):
+	"""Flat-extract a URL in the background, streaming entries as the extractor yields them"""
+	entries_found = QtCore.pyqtSignal(list)
+	failed = QtCore.pyqtSignal(str)
+	finished = QtCore.pyqtSignal(int)
+
+	BATCH_SIZE = 50
+	BATCH_INTERVAL = 0.1
+
+	def __init__(self, *, url: str, ydl_opts: dict, resolve=None, bypass_cache: bool = False):
+		super().__init__()
+		self.url = url
+		self.ydl_opts = ydl_opts
+		self.resolve = resolve
+		self.bypass_cache = bypass_cache
+		self.cancelled = False
+		self._batch: list[PlaylistEntry] = []
+		self._last_emit = 0.0
+		self.count = 0
+
+	def cancel(self):
+		self.cancelled = True
+
+	def _add(self, info: dict) -> PlaylistEntry:
+		# Only the compact projection is kept; the raw extractor dict is dropped here
+		entry = PlaylistEntry.from_info(info)
+		self._batch.append(entry)
+		self.count += 1
+		now = time.monotonic()
+		# The first entry goes out at once so the list fills immediately
+		if self.count == 1 or len(self._batch) >= self.BATCH_SIZE or now - self._last_emit >= self.BATCH_INTERVAL:
+			self._flush(now)
+		return entry
+
+	def _flush(self, now: float | None = None):
+		if self._batch:
+			self.entries_found.emit(self._batch)
+			self._batch = []
+		self._last_emit = now or time.monotonic()
+
+	def _stream(self, ydl, url: str) -> dict | None:
+		ie_result = ydl.extract_info(url, download=False, process=False)
+		if not isinstance(ie_result, dict):
+			return None
+		if ie_result.get('_type') not in ('playlist', 'multi_video'):
+			# Single media or a redirect: let yt-dlp resolve it fully
+			ie_result = ydl.process_ie_result(ie_result, download=False)
+			if not isinstance(ie_result, dict):
+				return None
+			if not ie_result.get('entries'):
+				return self._add(ie_result).to_dict()
+		extra = {
+			'playlist': ie_result.get('title') or ie_result.get('id'),
+			'playlist_id': ie_result.get('id'),
+		}
+		collected = []
+		for i, entry in enumerate(ie_result.get('entries') or [], start=1):
+			if self.cancelled:
+				return None
+			if not isinstance(entry, dict):
+				continue
+			entry = {**extra, **entry}
+			entry.setdefault('playlist_index', i)
+			collected.append(self._add(entry).to_dict())
+		return {'_type': 'playlist', 'id': ie_result.get('id'), 'title': ie_result.get('title'), 'entries': collected}
+
+	def run(self):
+		try:
+			url = self.resolve(self.url) if self.resolve else self.url
+			info = None if self.bypass_cache else metadata_cache.get_cache().get(url, self.ydl_opts)
+			if info is not None:
+				entries = info.get('entries') if isinstance(info, dict) and 'entries' in info else [info]
+				for entry in entries or []:
+					if isinstance(entry, dict):
+						self._add(entry)
+			else:
+				# yt-dlp takes a noticeable share of startup; it is loaded on the first fetch
+				from yt_dlp import YoutubeDL
+				with YoutubeDL(self.ydl_opts) as ydl:
+					info = self._stream(ydl, url)
+				if info is not None and not self.cancelled:
+					metadata_cache.get_cache().put(url, self.ydl_opts, info)
+			self._flush()
+		except Exception as e:
+			logging.error(f"Fetch failed for {self.url}: {e}")
+			self._flush()
+			self.failed.emit(str(e))
+		finally:
+			self.finished.emit(self.count)
+
+
 class DownloadWorker(QtCore.QObject):
+	"""Runs a DownloadEngine on a QThread, turning its callbacks into signals"""
 	progress = QtCore.pyqtSignal(str)
+	progress_data = QtCore.pyqtSignal(list)
+	batch_progress = QtCore.pyqtSignal(dict)
 	counts = QtCore.pyqtSignal(int, int, int)
 	finished = QtCore.pyqtSignal()
 	message = QtCore.pyqtSignal(str, str)
@@ -289,120 +395,53 @@ class DownloadWorker(QtCore.QObject):
 				download_dir: str,
 				cookies_path: str | None,
 				captions_lang: str,
-				use_archive: bool = True):
+				audio_target: str = DEFAULT_AUDIO_TARGET,
+				container: str = DEFAULT_CONTAINER,
+				use_archive: bool = True,
+				entries: list[PlaylistEntry] | None = None,
+				use_cache: bool = True,
+				max_parallel: int = DEFAULT_MAX_WORKERS,
+				per_host_limit: int = DEFAULT_PER_HOST_LIMIT):
 		super().__init__()
 		self.url = url
 		self.mode = mode
-		self.selected_indices = selected_indices
-		self.quality_selector = quality_selector
-		self.download_dir = download_dir
-		self.cookies_path = cookies_path
-		self.captions_lang = captions_lang
-		self.use_archive = use_archive
-
-	def _progress_hook(self, d):
-		try:
-			if d.get('status') == 'downloading':
-				percent = d.get('_percent_str', '').strip()
-				self.progress.emit(f"Downloading: {percent}")
-			elif d.get('status') == 'finished':
-				self.progress.emit(f"Finished: {d.get('filename')}")
-		except Exception:
-			pass
+		self.engine = DownloadEngine(
+			url=url,
+			download_dir=download_dir,
+			mode=mode,
+			selected_indices=selected_indices,
+			quality_selector=quality_selector,
+			cookies_path=cookies_path,
+			captions_lang=captions_lang,
+			audio_target=audio_target,
+			container=container,
+			use_archive=use_archive,
+			entries=entries,
+			use_cache=use_cache,
+			max_parallel=max_parallel,
+			per_host_limit=per_host_limit,
+			on_status=self.progress.emit,
+			on_progress=self.progress_data.emit,
+			on_batch=self.batch_progress.emit,
+			on_counts=self.counts.emit,
+		)
+
+	def cancel(self):
+		self.engine.cancel()
 
 	def run(self):
 		try:
-			ARCHIVE_FILE = os.path.join(self.download_dir, 'downloaded_videos.txt')
-			AUDIO_DIR = os.path.join(self.download_dir, 'audio_only')
-			os.makedirs(self.download_dir, exist_ok=True)
-			os.makedirs(AUDIO_DIR, exist_ok=True)
-
 			if self.mode == 'Captions':
-				target_dir = os.path.join(self.download_dir, 'captions')
-				os.makedirs(target_dir, exist_ok=True)
-				opts = {
-					'skip_download': True,
-					'writeautomaticsub': True,
-					'writesubtitles': True,
-					'subtitleslangs': [self.captions_lang or 'en'],
-					'outtmpl': os.path.join(target_dir, '%(title)s.%(ext)s'),
-					'subtitle_format': 'vtt',
-					'quiet': False,
-					'ignoreerrors': True,
-				}
-				if self.cookies_path:
-					opts['cookiefile'] = self.cookies_path
-				with YoutubeDL(opts) as ydl:
-					ydl.download([self.url])
+				target_dir = self.engine.download_captions()
 				self.message.emit('info', f"Captions saved to: {target_dir}")
-				self.finished.emit()
 				return
-
-			success_count = 0
-			failure_count = 0
-			total_items = len(self.selected_indices)
-			self.counts.emit(success_count, failure_count, total_items)
-
-			for offset, idx in enumerate(self.selected_indices, start=1):
-				outtmpl = '%(playlist_index|NA)s - %(title)s.%(ext)s'
-				paths = {'home': self.download_dir, 'temp': self.download_dir}
-				ydl_opts_item = {
-					'format': self.quality_selector or 'best',
-					'outtmpl': outtmpl,
-					'paths': paths,
-					'ignoreerrors': False,
-					'progress_hooks': [self._progress_hook],
-					'playlist_items': str(idx),
-					'retries': 10,
-					'fragment_retries': 10,
-					'concurrent_fragment_downloads': 3,
-					'windowsfilenames': True,
-					'restrictfilenames': True,
-					'socket_timeout': 60,
-					'http_timeout': 60,
-					'extractor_retries': 3,
-				}
-				if self.cookies_path:
-					ydl_opts_item['cookiefile'] = self.cookies_path
-				if self.use_archive:
-					ydl_opts_item['download_archive'] = ARCHIVE_FILE
-
-				if self.mode == 'Audio':
-					ydl_opts_item['extractaudio'] = True
-					ydl_opts_item['postprocessors'] = [{
-						'key': 'FFmpegExtractAudio',
-						'preferredcodec': 'mp3',
-						'preferredquality': '192',
-					}]
-				else:
-					ydl_opts_item['postprocessors'] = [{
-						'key': 'FFmpegVideoRemuxer',
-						'preferedformat': 'mkv'
-					}]
-
-				attempts = 0
-				local_max = 5
-				while True:
-					try:
-						self.progress.emit(f"Starting item {offset}/{total_items}")
-						with YoutubeDL(ydl_opts_item) as ydl:
-							ydl.download([self.url])
-						success_count += 1
-						self.counts.emit(success_count, failure_count, total_items)
-						break
-					except Exception as e:
-						attempts += 1
-						logging.error(f"Download failed (item {idx}) attempt {attempts}: {e}")
-						self.progress.emit(f"Error (attempt {attempts}/{local_max})")
-						if attempts >= local_max:
-							failure_count += 1
-							self.counts.emit(success_count, failure_count, total_items)
-							break
-
-			if failure_count == 0:
-				self.message.emit('info', f"All {success_count} item(s) downloaded successfully.")
+			results = self.engine.run()
+			failed = [r.index for r in results if not r.ok]
+			if not failed:
+				self.message.emit('info', f"All {self.engine.success_count} item(s) downloaded successfully.")
 			else:
-				self.message.emit('warn', f"Downloaded {success_count} with {failure_count} error(s). Check logs.")
+				listed = ', '.join(str(idx) for idx in failed[:20])
+				self.message.emit('warn', f"Downloaded {self.engine.success_count} with {len(failed)} error(s) (items: {listed}). Check logs.")
 		except Exception as e:
 			logging.exception("Worker error")
 			self.message.emit('error', str(e))
@@ -417,24 +456,148 @@ class FfmpegConvertWorker(QtCore.QObject):
 	def __init__(self, files: list[str]):
 		super().__init__()
 		self.files = files
+		self.pool = ConversionPool()
+		self.summary = ''
+
+	def cancel(self):
+		self.pool.cancel()
 
 	def run(self):
-		ok = 0
-		fail = 0
-		for f in self.files:
-			base, ext = os.path.splitext(f)
-			out = f"{base}.mp4"
-			if os.path.normpath(f).lower() == os.path.normpath(out).lower():
-				ok += 1
-				continue
-			cmd = ['ffmpeg', '-y', '-i', f, '-c:v', 'copy', '-c:a', 'copy', out]
-			try:
-				subprocess.run(cmd, check=True, text=True, capture_output=True, encoding='utf-8')
-				ok += 1
-			except Exception as e:
-				logging.error(f"Convert failed for {f}: {e}")
-				fail += 1
-		self.finished.emit(ok, fail)
+		results = self.pool.run(self.files, lambda d: self.progress.emit(format_progress(d)))
+		self.summary = summarize(results)
+		ok = sum(1 for _, success, _ in results if success)
+		self.finished.emit(ok, len(results) - ok)
+
+
+class ScanWorker(QtCore.QObject):
+	"""Scan a folder for videos, handing results to the GUI thread in chunks at most ~30 times a second"""
+	files_found = QtCore.pyqtSignal(list)
+	finished = QtCore.pyqtSignal(int)
+
+	EMIT_INTERVAL = 1 / 30
+
+	def __init__(self, path: str):
+		super().__init__()
+		self.path = path
+		self.scanner = FolderScanner()
+		self.cancelled = False
+		self._lock = threading.Lock()
+		self._pending: list[str] = []
+		self._last_emit = 0.0
+
+	def cancel(self):
+		self.cancelled = True
+		self.scanner.cancel()
+
+	def _on_batch(self, batch: list):
+		# Called from the scanner threads; chunks are coalesced so the GUI repaints at a bounded rate
+		with self._lock:
+			self._pending.extend(batch)
+			now = time.monotonic()
+			if now - self._last_emit < self.EMIT_INTERVAL:
+				return
+			chunk, self._pending = self._pending, []
+			self._last_emit = now
+		self.files_found.emit(chunk)
+
+	def run(self):
+		count = 0
+		try:
+			count = len(self.scanner.scan(self.path, self._on_batch))
+		except Exception as e:
+			logging.error(f"Scan failed for {self.path}: {e}")
+		finally:
+			with self._lock:
+				chunk, self._pending = self._pending, []
+			if chunk and not self.cancelled:
+				self.files_found.emit(chunk)
+			self.finished.emit(count)
+
+
+class PlaylistModel(QtCore.QAbstractListModel):
+	"""List model storing one display string per row, filled in batches and filterable by substring"""
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self._labels: list[str] = []
+		self._folded: list[str] = []
+		self._visible: list[int] | None = None  # source rows shown while a filter is active
+		self._filter = ''
+		self._muted: dict[int, str] = {}
+
+	def rowCount(self, parent=QtCore.QModelIndex()):
+		if parent.isValid():
+			return 0
+		return len(self._labels) if self._visible is None else len(self._visible)
+
+	def data(self, index, role=QtCore.Qt.DisplayRole):
+		if not index.isValid():
+			return None
+		row = self.source_row(index.row())
+		if role == QtCore.Qt.DisplayRole:
+			return self._labels[row]
+		if row in self._muted:
+			if role == QtCore.Qt.ForegroundRole:
+				return QtGui.QBrush(QtCore.Qt.gray)
+			if role == QtCore.Qt.ToolTipRole:
+				return self._muted[row]
+		return None
+
+	def source_row(self, row: int) -> int:
+		return row if self._visible is None else self._visible[row]
+
+	def visible_rows(self) -> list[int]:
+		return list(range(len(self._labels))) if self._visible is None else list(self._visible)
+
+	def label(self, row: int) -> str:
+		return self._labels[row]
+
+	def total_rows(self) -> int:
+		return len(self._labels)
+
+	def clear(self):
+		self.beginResetModel()
+		self._labels = []
+		self._folded = []
+		self._visible = None if not self._filter else []
+		self._muted = {}
+		self.endResetModel()
+
+	def append_rows(self, labels: list[str]):
+		"""Insert a batch of rows with a single insert notification"""
+		if not labels:
+			return
+		start = len(self._labels)
+		folded = [label.casefold() for label in labels]
+		if self._visible is None:
+			self.beginInsertRows(QtCore.QModelIndex(), start, start + len(labels) - 1)
+			self._labels.extend(labels)
+			self._folded.extend(folded)
+			self.endInsertRows()
+			return
+		matches = [start + i for i, text in enumerate(folded) if self._filter in text]
+		self._labels.extend(labels)
+		self._folded.extend(folded)
+		if matches:
+			first = len(self._visible)
+			self.beginInsertRows(QtCore.QModelIndex(), first, first + len(matches) - 1)
+			self._visible.extend(matches)
+			self.endInsertRows()
+
+	def set_filter(self, text: str):
+		self.beginResetModel()
+		self._filter = (text or '').casefold()
+		if self._filter:
+			self._visible = [i for i, folded in enumerate(self._folded) if self._filter in folded]
+		else:
+			self._visible = None
+		self.endResetModel()
+
+	def set_muted(self, rows: dict[int, str]):
+		"""Grey out source rows, with a tooltip explaining why"""
+		self._muted = dict(rows)
+		if self.rowCount():
+			self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1), [QtCore.Qt.ForegroundRole, QtCore.Qt.ToolTipRole])
 
 
 class DropLineEdit(QtWidgets.QLineEdit):
@@ -458,6 +621,8 @@ class DropLineEdit(QtWidgets.QLineEdit):
 
 
 class MainWindow(QtWidgets.QMainWindow):
+	setup_done = QtCore.pyqtSignal(str)
+
 	def __init__(self):
 		super().__init__()
 		self.setWindowTitle(APP_NAME)
@@ -471,9 +636,20 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.last_url = self.settings.value('last_url', '', type=str)
 		self.last_mode = self.settings.value('last_mode', 'Video', type=str)
 		self.captions_lang = self.settings.value('captions_lang', 'en', type=str)
+		self.audio_target = self.settings.value('audio_format', DEFAULT_AUDIO_TARGET, type=str)
+		self.container = self.settings.value('container', DEFAULT_CONTAINER, type=str)
+		self.max_parallel = self.settings.value('max_parallel', DEFAULT_MAX_WORKERS, type=int)
 
-		self.playlist_entries: list[dict] = []
+		self.playlist_entries: list[PlaylistEntry] = []
 		self.current_formats: list[tuple[str, str]] = []
+		self.fetch_worker: FetchWorker | None = None
+		self._fetch_failed = False
+		self.scanned_files: list[str] = []
+		self.scan_worker: ScanWorker | None = None
+		self.convert_worker: FfmpegConvertWorker | None = None
+		# Fetch, scan and conversion threads still running; the window only closes once they end
+		self._threads: set[QtCore.QThread] = set()
+		self._closing = False
 
 		self._build_ui()
 		self._apply_theme()
@@ -484,8 +660,33 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.settings.setValue('last_url', self.url_edit.text().strip())
 		self.settings.setValue('last_mode', self.mode_group.checkedButton().text())
 		self.settings.setValue('captions_lang', self.captions_combo.currentText())
+		self.settings.setValue('audio_format', self.audio_format_combo.currentText())
+		self.settings.setValue('container', self.container_combo.currentText())
+		self.settings.setValue('max_parallel', self.parallel_spin.value())
+		self._cancel_fetch()
+		self._cancel_scan()
+		if self.convert_worker is not None:
+			self.convert_worker.cancel()
+		if self._threads:
+			# A fetch blocked in network I/O only sees the cancel once it returns; destroying its
+			# QThread before that aborts the process, so closing finishes in _on_thread_finished
+			self._closing = True
+			self.status.showMessage('Stopping background tasks...')
+			event.ignore()
+			return
 		super().closeEvent(event)
 
+	def _track_thread(self, thread: QtCore.QThread):
+		"""Keep thread referenced until it ends (call before connecting deleteLater)"""
+		self._threads.add(thread)
+		thread.finished.connect(lambda: self._on_thread_finished(thread))
+
+	def _on_thread_finished(self, thread: QtCore.QThread):
+		thread.wait()
+		self._threads.discard(thread)
+		if self._closing and not self._threads:
+			self.close()
+
 	def _build_ui(self):
 		central = QtWidgets.QWidget(self)
 		self.setCentralWidget(central)
@@ -499,11 +700,14 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.url_edit = DropLineEdit()
 		self.url_edit.setPlaceholderText('Paste or drop a video/playlist URL here')
 		self.url_edit.setText(self.last_url)
-		fetch_btn = QtWidgets.QPushButton('Fetch')
-		fetch_btn.clicked.connect(self.fetch_videos)
+		self.fetch_btn = QtWidgets.QPushButton('Fetch')
+		self.fetch_btn.clicked.connect(self.fetch_videos)
+		self.refresh_cb = QtWidgets.QCheckBox('Refresh')
+		self.refresh_cb.setToolTip('Ignore cached metadata and fetch again')
 		url_row.addWidget(url_label)
 		url_row.addWidget(self.url_edit, 1)
-		url_row.addWidget(fetch_btn)
+		url_row.addWidget(self.fetch_btn)
+		url_row.addWidget(self.refresh_cb)
 
 		# Mode + quality row
 		mode_row = QtWidgets.QHBoxLayout()
@@ -537,6 +741,22 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.load_formats_btn.clicked.connect(self.load_formats_for_selection)
 		mode_row.addWidget(self.load_formats_btn)
 
+		mode_row.addSpacing(12)
+		mode_row.addWidget(QtWidgets.QLabel('Container:'))
+		self.container_combo = QtWidgets.QComboBox()
+		self.container_combo.addItems(VIDEO_CONTAINERS)
+		self.container_combo.setCurrentText(self.container if self.container in VIDEO_CONTAINERS else DEFAULT_CONTAINER)
+		self.container_combo.setToolTip('Merged straight into this container, so no separate remux or MKV to MP4 conversion is needed')
+		mode_row.addWidget(self.container_combo)
+
+		mode_row.addSpacing(12)
+		mode_row.addWidget(QtWidgets.QLabel('Audio:'))
+		self.audio_format_combo = QtWidgets.QComboBox()
+		self.audio_format_combo.addItems(AUDIO_TARGETS)
+		self.audio_format_combo.setCurrentText(self.audio_target if self.audio_target in AUDIO_TARGETS else DEFAULT_AUDIO_TARGET)
+		self.audio_format_combo.setToolTip('auto keeps the original codec without re-encoding; mp3 always re-encodes')
+		mode_row.addWidget(self.audio_format_combo)
+
 		mode_row.addSpacing(12)
 		mode_row.addWidget(QtWidgets.QLabel('CC Lang:'))
 		self.captions_combo = QtWidgets.QComboBox()
@@ -550,9 +770,19 @@ class MainWindow(QtWidgets.QMainWindow):
 		# List and actions
 		list_row = QtWidgets.QHBoxLayout()
 		layout.addLayout(list_row, 1)
-		self.list_widget = QtWidgets.QListWidget()
-		self.list_widget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
-		list_row.addWidget(self.list_widget, 1)
+		list_col = QtWidgets.QVBoxLayout()
+		list_row.addLayout(list_col, 1)
+		self.filter_edit = QtWidgets.QLineEdit()
+		self.filter_edit.setPlaceholderText('Filter by title')
+		self.filter_edit.setClearButtonEnabled(True)
+		list_col.addWidget(self.filter_edit)
+		self.list_model = PlaylistModel(self)
+		self.list_view = QtWidgets.QListView()
+		self.list_view.setModel(self.list_model)
+		self.list_view.setUniformItemSizes(True)
+		self.list_view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+		self.filter_edit.textChanged.connect(self.list_model.set_filter)
+		list_col.addWidget(self.list_view, 1)
 
 		# Right actions
 		actions_col = QtWidgets.QVBoxLayout()
@@ -567,6 +797,11 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.scan_btn = QtWidgets.QPushButton('Scan Folder for Videos')
 		self.scan_btn.clicked.connect(self.scan_folder)
 		actions_col.addWidget(self.scan_btn)
+		self.convert_scanned_btn = QtWidgets.QPushButton('Convert Scanned')
+		self.convert_scanned_btn.setToolTip('Convert the selected scanned files, or all listed files when none are selected')
+		self.convert_scanned_btn.clicked.connect(self.convert_scanned)
+		self.convert_scanned_btn.setVisible(False)
+		actions_col.addWidget(self.convert_scanned_btn)
 		actions_col.addStretch(1)
 
 		# Folder chooser and counts
@@ -578,6 +813,12 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.folder_label.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
 		folder_row.addWidget(self.folder_btn)
 		folder_row.addWidget(self.folder_label, 1)
+		folder_row.addWidget(QtWidgets.QLabel('Parallel:'))
+		self.parallel_spin = QtWidgets.QSpinBox()
+		self.parallel_spin.setRange(1, 8)
+		self.parallel_spin.setValue(self.max_parallel)
+		self.parallel_spin.setToolTip('Number of items downloaded at the same time')
+		folder_row.addWidget(self.parallel_spin)
 
 		# Progress and start
 		self.counts_label = QtWidgets.QLabel('Downloaded: 0/0 | Errors: 0')
@@ -631,6 +872,8 @@ class MainWindow(QtWidgets.QMainWindow):
 		mode = self.mode_group.checkedButton().text() if self.mode_group.checkedButton() else 'Video'
 		self.load_formats_btn.setEnabled(mode != 'Captions')
 		self.captions_combo.setEnabled(mode == 'Captions')
+		self.audio_format_combo.setEnabled(mode == 'Audio')
+		self.container_combo.setEnabled(mode == 'Video')
 		self.quality_combo.clear()
 		if mode == 'Video':
 			self.quality_combo.addItems(self.default_video_qualities)
@@ -650,89 +893,117 @@ class MainWindow(QtWidgets.QMainWindow):
 			QtWidgets.QMessageBox.critical(self, APP_NAME, text)
 
 	def resolve_final_url(self, input_url: str) -> str:
-		try:
-			import requests
-			headers = {'User-Agent': 'Mozilla/5.0'}
-			resp = requests.get(input_url, headers=headers, allow_redirects=True, timeout=15)
-			return resp.url or input_url
-		except ImportError:
-			# Fallback if requests not available
-			return input_url
-		except Exception:
-			return input_url
+		# HEAD-first and cached; canonical hosts are returned without a request
+		return url_resolver.resolve_final_url(input_url)
 
 	def fetch_videos(self):
-		self.playlist_entries = []
-		self.list_widget.clear()
+		if self.fetch_worker is not None:
+			# A fetch is running; the button acts as Cancel
+			self.fetch_worker.cancel()
+			self.status.showMessage('Cancelling fetch...')
+			return
 		url = (self.url_edit.text() or '').strip()
-		url = self.resolve_final_url(url)
 		if not url:
 			self.show_message('warn', 'Please enter a URL.')
 			return
+		self.playlist_entries = []
+		self._cancel_scan()
+		self.scanned_files = []
+		self.convert_scanned_btn.setVisible(False)
+		self.list_model.clear()
+		self._fetch_failed = False
 		self.status.showMessage('Fetching...')
-		QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-		QtWidgets.QApplication.processEvents()
-		try:
-			ydl_opts = {
-				'extract_flat': True,
-				'quiet': True,
-				'skip_download': True,
-				'socket_timeout': 60,
-				'http_timeout': 60,
-				'extractor_retries': 3,
-			}
-			if self.cookies_path:
-				ydl_opts['cookiefile'] = self.cookies_path
-			with YoutubeDL(ydl_opts) as ydl:
-				info = ydl.extract_info(url, download=False)
-				if isinstance(info, dict) and info.get('entries'):
-					for i, entry in enumerate(info['entries'] or []):
-						if not isinstance(entry, dict):
-							continue
-						title = entry.get('title') or entry.get('id', 'Unknown')
-						self.playlist_entries.append(entry)
-						self.list_widget.addItem(f"{i+1:03d}. {title}")
-					if not info['entries']:
-						self.show_message('warn', 'No media found.')
-				elif isinstance(info, dict):
-					title = info.get('title') or info.get('id', 'Unknown')
-					self.playlist_entries.append(info)
-					self.list_widget.addItem(f"001. {title}")
-				else:
-					self.show_message('warn', 'No downloadable media found.')
-		except Exception as e:
-			self.show_message('error', f"Could not fetch info. If site requires auth, try loading cookies.txt and retry.\n\n{e}")
-		finally:
-			self.status.showMessage('Ready')
-			QtWidgets.QApplication.restoreOverrideCursor()
+		self.fetch_btn.setText('Cancel')
+		ydl_opts = {
+			'extract_flat': True,
+			'quiet': True,
+			'skip_download': True,
+			'socket_timeout': 60,
+			'http_timeout': 60,
+			'extractor_retries': 3,
+		}
+		if self.cookies_path:
+			ydl_opts['cookiefile'] = self.cookies_path
+
+		worker = FetchWorker(url=url, ydl_opts=ydl_opts, resolve=self.resolve_final_url,
+							bypass_cache=self.refresh_cb.isChecked())
+		thread = QtCore.QThread(self)
+		worker.moveToThread(thread)
+		thread.started.connect(worker.run)
+		# Bound like the scan signals, so a cancelled fetch is told apart from the current one
+		worker.entries_found.connect(lambda entries: self._on_entries_found(worker, entries))
+		worker.failed.connect(lambda error: self._on_fetch_failed(worker, error))
+		worker.finished.connect(lambda count: self._on_fetch_finished(worker, count))
+		worker.finished.connect(thread.quit)
+		worker.finished.connect(worker.deleteLater)
+		self._track_thread(thread)
+		thread.finished.connect(thread.deleteLater)
+		self.fetch_worker = worker
+		thread.start()
+
+	def _selected_rows(self) -> list[int]:
+		"""Selected rows of the list, as rows of the unfiltered model"""
+		return sorted(self.list_model.source_row(index.row()) for index in self.list_view.selectionModel().selectedRows())
+
+	def _on_entries_found(self, worker: FetchWorker, entries: list):
+		# Entries still queued from a cancelled fetch are dropped
+		if worker is not self.fetch_worker:
+			return
+		labels = []
+		for entry in entries:
+			self.playlist_entries.append(entry)
+			labels.append(f"{len(self.playlist_entries):03d}. {entry.title}")
+		self.list_model.append_rows(labels)
+		self.status.showMessage(f'Fetching... {len(self.playlist_entries)} item(s)')
+
+	def _on_fetch_failed(self, worker: FetchWorker, error: str):
+		if worker is not self.fetch_worker:
+			return
+		self._fetch_failed = True
+		self.show_message('error', f"Could not fetch info. If site requires auth, try loading cookies.txt and retry.\n\n{error}")
+
+	def _on_fetch_finished(self, worker: FetchWorker, count: int):
+		if worker is not self.fetch_worker:
+			return
+		cancelled = worker.cancelled
+		self.fetch_worker = None
+		self.fetch_btn.setText('Fetch')
+		if cancelled:
+			self.status.showMessage(f'Fetch cancelled | {count} item(s)')
+			return
+		self.status.showMessage(f'Ready | {count} item(s)')
+		if count == 0 and not self._fetch_failed:
+			self.show_message('warn', 'No media found.')
 
 	def load_formats_for_selection(self):
-		selected = self.list_widget.selectedIndexes()
+		selected = self._selected_rows()
 		if not selected:
 			self.show_message('warn', 'Select a video to load formats.')
 			return
-		idx = selected[0].row()
-		url = (self.url_edit.text() or '').strip()
-		url = self.resolve_final_url(url)
+		idx = selected[0]
+		# Load formats of the selected entry itself; the result is cached and reused by its download
+		item_url = self.playlist_entries[idx].url if idx < len(self.playlist_entries) else None
+		url = item_url or self.resolve_final_url((self.url_edit.text() or '').strip())
 		if not url:
 			self.show_message('warn', 'Please enter a URL first.')
 			return
+		bypass = self.refresh_cb.isChecked()
 		self.progress_label.setText('Loading formats...')
 
 		def _load():
 			try:
 				base_opts = {
 					'quiet': True,
-					'playlist_items': str(idx + 1),
 					'extract_flat': False,  # Need full info for formats
 					'socket_timeout': 60,
 					'http_timeout': 60,
 					'extractor_retries': 3,
 				}
+				if not item_url:
+					base_opts['playlist_items'] = str(idx + 1)
 				if self.cookies_path:
 					base_opts['cookiefile'] = self.cookies_path
-				with YoutubeDL(base_opts) as ydl:
-					info = ydl.extract_info(url, download=False)
+				info = metadata_cache.extract_info(url, base_opts, bypass=bypass, ttl=metadata_cache.FORMATS_TTL)
 			except Exception as e:
 				logging.error(f"Format load failed: {e}")
 				QtCore.QMetaObject.invokeMethod(self, '_update_progress_text', QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, 'Failed to load formats'))
@@ -787,15 +1058,15 @@ class MainWindow(QtWidgets.QMainWindow):
 			self.quality_combo.addItem(label)
 
 	def download_selected(self):
-		selected = self.list_widget.selectedIndexes()
-		if not selected and self.list_widget.count() > 0:
-			# If nothing selected, default to all
-			selected_indices = [i + 1 for i in range(self.list_widget.count())]
+		selected = self._selected_rows()
+		if not selected and self.list_model.rowCount() > 0:
+			# If nothing selected, default to all rows shown
+			selected_indices = [i + 1 for i in self.list_model.visible_rows()]
 		elif not selected:
 			self.show_message('warn', 'Select at least one item.')
 			return
 		else:
-			selected_indices = [s.row() + 1 for s in selected]
+			selected_indices = [row + 1 for row in selected]
 
 		mode = self.mode_group.checkedButton().text() if self.mode_group.checkedButton() else 'Video'
 		selected_label = self.quality_combo.currentText()
@@ -812,6 +1083,16 @@ class MainWindow(QtWidgets.QMainWindow):
 		if not url:
 			self.show_message('warn', 'Enter URL')
 			return
+		if self.scanned_files and not self.playlist_entries:
+			# Rows are scanned files, not playlist positions
+			self.show_message('info', 'The list shows scanned files. Fetch a URL to download.')
+			return
+
+		if mode != 'Captions' and self.playlist_entries:
+			selected_indices = self._plan_selection(selected_indices)
+			if not selected_indices:
+				self.show_message('info', 'All selected items are already downloaded.')
+				return
 
 		self.progress_bar.setVisible(True)
 		self.progress_label.setText('Starting...')
@@ -826,11 +1107,18 @@ class MainWindow(QtWidgets.QMainWindow):
 			download_dir=self.download_dir,
 			cookies_path=self.cookies_path,
 			captions_lang=self.captions_combo.currentText(),
+			audio_target=self.audio_format_combo.currentText(),
+			container=self.container_combo.currentText(),
+			entries=list(self.playlist_entries),
+			use_cache=not self.refresh_cb.isChecked(),
+			max_parallel=self.parallel_spin.value(),
 		)
 		self.thread = QtCore.QThread(self)
 		self.worker.moveToThread(self.thread)
 		self.thread.started.connect(self.worker.run)
 		self.worker.progress.connect(self.progress_label.setText)
+		self.worker.progress_data.connect(self._on_progress_data)
+		self.worker.batch_progress.connect(self._on_batch_progress)
 		self.worker.counts.connect(lambda ok, fail, total: self.counts_label.setText(f"Downloaded: {ok}/{total} | Errors: {fail}"))
 		self.worker.message.connect(self._on_worker_message)
 		self.worker.finished.connect(self._on_worker_finished)
@@ -839,11 +1127,38 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.thread.finished.connect(self.thread.deleteLater)
 		self.thread.start()
 
+	def _plan_selection(self, selected_indices: list[int]) -> list[int]:
+		"""Drop already-archived items up front and mark the plan in the list"""
+		archive = get_archive_index(os.path.join(self.download_dir, ARCHIVE_FILENAME))
+		pending, archived = plan_downloads(self.playlist_entries, [i - 1 for i in sorted(selected_indices)], archive)
+		self.list_model.set_muted({row: 'Already downloaded - skipped' for row in archived})
+		self.status.showMessage(f'Queued {len(pending)} item(s), skipped {len(archived)} already downloaded')
+		return [row + 1 for row in pending]
+
+	def _on_progress_data(self, snapshots: list):
+		self.progress_label.setText(format_snapshot(snapshots[-1]))
+
+	def _on_batch_progress(self, batch: dict):
+		if self.progress_bar.maximum() != 1000:
+			self.progress_bar.setRange(0, 1000)
+		self.progress_bar.setValue(int(batch['percent'] * 10))
+		self.progress_bar.setFormat(format_batch(batch))
+
+	def start_environment_check(self):
+		"""Verify packages and FFmpeg off the UI thread; skipped quickly when already verified"""
+		self.setup_done.connect(self._on_setup_done)
+		start_background_setup(on_done=lambda error: self.setup_done.emit(str(error) if error else ''))
+
+	def _on_setup_done(self, error: str):
+		if error:
+			self.show_message('warn', f'Environment setup failed, some features may not work:\n{error}')
+
 	def _on_worker_message(self, kind: str, text: str):
 		self.show_message(kind, text)
 
 	def _on_worker_finished(self):
 		self.progress_bar.setVisible(False)
+		self.progress_bar.setFormat('%p%')
 		self.start_btn.setEnabled(True)
 		self.status.showMessage('Ready')
 
@@ -942,19 +1257,44 @@ class MainWindow(QtWidgets.QMainWindow):
 		files, _ = QtWidgets.QFileDialog.getOpenFileNames(self, 'Choose MKV/Video files', '', 'Video Files (*.mkv *.mp4 *.avi *.mov *.wmv *.flv *.webm);;All Files (*)')
 		if not files:
 			return
+		self._start_conversion(files)
+
+	def convert_scanned(self):
+		rows = self._selected_rows() or self.list_model.visible_rows()
+		files = [self.scanned_files[r] for r in rows if r < len(self.scanned_files)]
+		if not files:
+			self.show_message('warn', 'No files to convert. Run Scan first.')
+			return
+		self._start_conversion(files)
+
+	def _start_conversion(self, files: list[str]):
+		if self.convert_worker is not None:
+			self.show_message('warn', 'A conversion is already running.')
+			return
 		self.progress_bar.setVisible(True)
 		self.progress_bar.setRange(0, 0)
+		self.progress_label.setText(f'Converting {len(files)} file(s)...')
 		worker = FfmpegConvertWorker(files)
 		thread = QtCore.QThread(self)
 		worker.moveToThread(thread)
 		thread.started.connect(worker.run)
-		worker.finished.connect(lambda ok, fail: self.show_message('info', f'Converted: {ok}, Failed: {fail}'))
+		worker.progress.connect(self.progress_label.setText)
+		worker.finished.connect(self._on_convert_finished)
 		worker.finished.connect(thread.quit)
 		worker.finished.connect(worker.deleteLater)
 		thread.finished.connect(self._hide_progress)
+		self._track_thread(thread)
 		thread.finished.connect(thread.deleteLater)
+		self.convert_worker = worker
 		thread.start()
 
+	def _on_convert_finished(self, ok: int, fail: int):
+		message = self.convert_worker.summary or f'Converted: {ok}, Failed: {fail}'
+		self.convert_worker = None
+		self.progress_label.setText(message.splitlines()[0])
+		if not self._closing:
+			self.show_message('info', message)
+
 	def _hide_progress(self):
 		self.progress_bar.setVisible(False)
 
@@ -962,16 +1302,55 @@ class MainWindow(QtWidgets.QMainWindow):
 		path = QtWidgets.QFileDialog.getExistingDirectory(self, 'Choose folder to scan for videos', self.download_dir)
 		if not path:
 			return
-		self.list_widget.clear()
-		def _scan():
-			video_extensions = ['.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm']
-			for dirpath, dirnames, filenames in os.walk(path):
-				for filename in filenames:
-					if any(filename.lower().endswith(ext) for ext in video_extensions):
-						self.list_widget.addItem(os.path.join(dirpath, filename))
-			if self.list_widget.count() == 0:
-				self.show_message('info', 'No videos found in the selected folder.')
-		threading.Thread(target=_scan, daemon=True).start()
+		self._cancel_scan()
+		self._cancel_fetch()
+		# The list now shows files, so the fetched playlist no longer matches its rows
+		self.playlist_entries = []
+		self.list_model.clear()
+		self.scanned_files = []
+		self.convert_scanned_btn.setVisible(False)
+		self.progress_label.setText(f'Scanning {path}...')
+		worker = ScanWorker(path)
+		thread = QtCore.QThread(self)
+		worker.moveToThread(thread)
+		thread.started.connect(worker.run)
+		# The worker is passed along: sender() is not reliable for signals queued from other threads
+		worker.files_found.connect(lambda files: self._on_scan_results(worker, files))
+		worker.finished.connect(lambda count: self._on_scan_done(worker, count))
+		worker.finished.connect(thread.quit)
+		worker.finished.connect(worker.deleteLater)
+		self._track_thread(thread)
+		thread.finished.connect(thread.deleteLater)
+		self.scan_worker = worker
+		thread.start()
+
+	def _cancel_fetch(self):
+		if self.fetch_worker is not None:
+			self.fetch_worker.cancel()
+			self.fetch_worker = None
+			self.fetch_btn.setText('Fetch')
+
+	def _cancel_scan(self):
+		if self.scan_worker is not None:
+			self.scan_worker.cancel()
+			self.scan_worker = None
+
+	def _on_scan_results(self, worker: ScanWorker, files: list):
+		# Chunks still queued from a cancelled scan are dropped
+		if worker is not self.scan_worker:
+			return
+		self.scanned_files.extend(files)
+		self.list_model.append_rows(files)
+		self.convert_scanned_btn.setVisible(True)
+		self.progress_label.setText(f'Scanning... {len(self.scanned_files)} video(s) found')
+
+	def _on_scan_done(self, worker: ScanWorker, count: int):
+		if worker is not self.scan_worker:
+			return
+		self.scan_worker = None
+		self.progress_label.setText(f'{count} video(s) found')
+		if not count:
+			self.show_message('info', 'No videos found in the selected folder.')
 
 
 def check_admin_privileges():
@@ -1023,6 +1402,7 @@ def main():
 	
 	window = MainWindow()
 	window.show()
+	QtCore.QTimer.singleShot(0, window.start_environment_check)
 	sys.exit(app.exec_())
 
 
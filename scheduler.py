@@ -0,0 +1,90 @@
+# scheduler.py
+import logging
+import threading
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_WORKERS = 3
+DEFAULT_PER_HOST_LIMIT = 4
+
+
+def host_key(url):
+    """Return the host a URL points at, used to group items for per-host caps"""
+    try:
+        host = (urlsplit(url).hostname or '').lower()
+    except ValueError:
+        host = ''
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+class DownloadScheduler:
+    """Run items on a bounded pool of threads, with a concurrency cap per host.
+
+    Items are dispatched in index order; an item is only passed over while its
+    host is at its cap, so one busy host never starves the others.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, per_host_limit=DEFAULT_PER_HOST_LIMIT, key=host_key):
+        self.max_workers = max(1, int(max_workers or 1))
+        self.per_host_limit = max(1, int(per_host_limit)) if per_host_limit else None
+        self.key = key
+        self._cond = threading.Condition()
+        self._cancelled = False
+
+    def cancel(self):
+        """Stop handing out new items; running items finish normally"""
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+    def run(self, items, task, on_result=None):
+        """Run task(index, target) for every (index, target) pair in items.
+
+        on_result(index, result) is called from the worker thread as soon as an
+        item finishes. Returns [(index, result), ...] sorted by index; an item
+        whose task raised gets the exception as its result.
+        """
+        pending = [(index, target, self.key(target)) for index, target in sorted(items, key=lambda it: it[0])]
+        results = {}
+        active = {}
+        order = [index for index, _, _ in pending]
+
+        def take_next():
+            for pos, (index, target, host) in enumerate(pending):
+                if self.per_host_limit is None or active.get(host, 0) < self.per_host_limit:
+                    del pending[pos]
+                    active[host] = active.get(host, 0) + 1
+                    return index, target, host
+            return None
+
+        def worker():
+            while True:
+                with self._cond:
+                    while True:
+                        if self._cancelled or not pending:
+                            return
+                        item = take_next()
+                        if item is not None:
+                            break
+                        self._cond.wait()
+                index, target, host = item
+                try:
+                    result = task(index, target)
+                except Exception as e:
+                    logging.exception(f"Scheduled task failed (item {index})")
+                    result = e
+                with self._cond:
+                    active[host] -= 1
+                    results[index] = result
+                    self._cond.notify_all()
+                if on_result:
+                    on_result(index, result)
+
+        threads = [threading.Thread(target=worker, daemon=True)
+                   for _ in range(min(self.max_workers, len(pending)))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return [(index, results[index]) for index in order if index in results]
@@ -1,61 +1,117 @@
 # setup_helper.py
 import os
 import sys
+import json
+import hashlib
+import logging
 import subprocess
-import shutil
-import platform
-import urllib.request
-import zipfile
-import tarfile
+import threading
+import importlib.util
+
+from app_paths import user_cache_dir
 
 REQUIRED_PACKAGES = ["yt_dlp", "ffmpeg-python", "PyQt5", "requests"]
+# The Tk app has no use for PyQt5
+TK_PACKAGES = ["yt_dlp", "ffmpeg-python", "requests"]
+
+# pip name -> module it installs, where the two differ
+MODULE_NAMES = {"ffmpeg-python": "ffmpeg"}
+STAMP_FILE = "environment-{key}.json"
+
+
+def module_name(pkg):
+    return MODULE_NAMES.get(pkg, pkg.replace("-", "_"))
+
+
+def missing_packages(packages=REQUIRED_PACKAGES):
+    """Packages whose module cannot be found; nothing is imported"""
+    return [pkg for pkg in packages if importlib.util.find_spec(module_name(pkg)) is None]
+
 
-def install_missing_packages():
-    for pkg in REQUIRED_PACKAGES:
+def install_missing_packages(packages=REQUIRED_PACKAGES):
+    for pkg in missing_packages(packages):
+        subprocess.check_call([sys.executable, "-m", "pip", "install", pkg])
+
+
+def package_versions(packages=REQUIRED_PACKAGES):
+    """Installed version of each package from its metadata (None when not installed)"""
+    import importlib.metadata
+    versions = {}
+    for pkg in packages:
         try:
-            __import__(pkg.replace("-", "_"))
-        except ImportError:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", pkg])
+            versions[pkg] = importlib.metadata.version(pkg)
+        except importlib.metadata.PackageNotFoundError:
+            versions[pkg] = None
+    return versions
 
-def download_and_setup_ffmpeg():
-    system = platform.system()
-    ffmpeg_dir = os.path.join(os.getcwd(), "ffmpeg_bin")
-    ffmpeg_path = os.path.join(ffmpeg_dir, "ffmpeg.exe" if system == "Windows" else "ffmpeg")
 
-    if shutil.which("ffmpeg") or os.path.exists(ffmpeg_path):
-        os.environ["PATH"] += os.pathsep + ffmpeg_dir
-        return
+def _stamp_path(packages):
+    """One stamp per package set, so the Tk and Qt apps do not overwrite each other's"""
+    key = hashlib.sha1('\n'.join(sorted(packages)).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(user_cache_dir('setup'), STAMP_FILE.format(key=key))
+
+
+def _environment(packages):
+    return {'python': sys.executable, 'packages': package_versions(packages)}
+
 
-    print("Downloading FFmpeg...")
-    os.makedirs(ffmpeg_dir, exist_ok=True)
-
-    if system == "Windows":
-        url = "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
-        zip_path = os.path.join(ffmpeg_dir, "ffmpeg.zip")
-        urllib.request.urlretrieve(url, zip_path)
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(ffmpeg_dir)
-        # Locate ffmpeg.exe inside the extracted folder
-        for root, dirs, files in os.walk(ffmpeg_dir):
-            if "ffmpeg.exe" in files:
-                shutil.copy(os.path.join(root, "ffmpeg.exe"), ffmpeg_path)
-                break
-        os.remove(zip_path)
-
-    elif system == "Linux":
-        url = "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz"
-        tar_path = os.path.join(ffmpeg_dir, "ffmpeg.tar.xz")
-        urllib.request.urlretrieve(url, tar_path)
-        with tarfile.open(tar_path) as tar_ref:
-            tar_ref.extractall(ffmpeg_dir)
-        for root, dirs, files in os.walk(ffmpeg_dir):
-            if "ffmpeg" in files and os.access(os.path.join(root, "ffmpeg"), os.X_OK):
-                shutil.copy(os.path.join(root, "ffmpeg"), ffmpeg_path)
-                break
-        os.remove(tar_path)
-
-    os.environ["PATH"] += os.pathsep + ffmpeg_dir
-
-def full_setup():
-    install_missing_packages()
+def is_verified(packages=REQUIRED_PACKAGES):
+    """True when an earlier full_setup verified this interpreter with the same package versions"""
+    try:
+        with open(_stamp_path(packages), 'r', encoding='utf-8') as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    env = _environment(packages)
+    return stamp == env and None not in env['packages'].values()
+
+
+def write_stamp(packages=REQUIRED_PACKAGES):
+    path = _stamp_path(packages)
+    try:
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(_environment(packages), f)
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        logging.warning(f"Could not write environment stamp: {e}")
+
+
+def download_and_setup_ffmpeg(on_status=print):
+    """Put FFmpeg on PATH: the system one, or the verified build cached per user (see ffmpeg_provision)"""
+    from ffmpeg_provision import ensure_ffmpeg
+    return ensure_ffmpeg(on_status=on_status)
+
+
+def full_setup(packages=REQUIRED_PACKAGES, force=False):
+    """Install missing packages and FFmpeg.
+
+    Once an environment has been verified, a stamp with the interpreter and
+    package versions is kept in the user cache; later launches with the same
+    stamp skip the package probing and only put FFmpeg on PATH.
+    """
+    if not force and is_verified(packages):
+        download_and_setup_ffmpeg()
+        return
+    install_missing_packages(packages)
     download_and_setup_ffmpeg()
+    write_stamp(packages)
+
+
+def start_background_setup(packages=REQUIRED_PACKAGES, on_done=None):
+    """Run full_setup on a daemon thread so the window can show first.
+
+    on_done(error) is called from that thread with None on success.
+    """
+    def run():
+        error = None
+        try:
+            full_setup(packages)
+        except Exception as e:
+            logging.error(f"Environment setup failed: {e}")
+            error = e
+        if on_done:
+            on_done(error)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
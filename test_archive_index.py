@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from archive_index import ArchiveIndex, get_archive_index, plan_downloads
+from yt_dlp import YoutubeDL
+
+class TestArchiveIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'downloaded_videos.txt')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("youtube abcdefghijk\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_exact_matching(self):
+        index = ArchiveIndex(self.path)
+        self.assertTrue(index.contains('abcdefghijk', 'Youtube'))
+        self.assertTrue(index.contains_entry({'id': 'abcdefghijk'}))
+        self.assertFalse(index.contains('abc', 'Youtube'))
+        self.assertFalse(index.contains('abcdefghijk', 'Vimeo'))
+
+    def test_add_appends_and_refresh_sees_external_lines(self):
+        index = get_archive_index(self.path)
+        index.add('youtube zzz')
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("vimeo 123\n")
+        self.assertIs(get_archive_index(self.path), index)
+        self.assertIn('vimeo 123', index)
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(f.read().split('\n'), ['youtube abcdefghijk', 'youtube zzz', 'vimeo 123', ''])
+
+    def test_backs_yt_dlp_download_archive(self):
+        index = ArchiveIndex(self.path)
+        with YoutubeDL({'download_archive': index, 'quiet': True}) as ydl:
+            self.assertTrue(ydl.in_download_archive({'id': 'abcdefghijk', 'extractor_key': 'Youtube'}))
+            ydl.record_download_archive({'id': 'newid', 'extractor_key': 'Youtube'})
+        self.assertTrue(ArchiveIndex(self.path).contains('newid', 'youtube'))
+
+    def test_plan_downloads(self):
+        entries = [{'id': 'abcdefghijk', 'ie_key': 'Youtube'}, {'id': 'other', 'ie_key': 'Youtube'}]
+        pending, archived = plan_downloads(entries, [0, 1, 5], ArchiveIndex(self.path))
+        self.assertEqual(pending, [1, 5])
+        self.assertEqual(archived, [0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+import threading
+import subprocess
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from download_cli import EXIT_FAILED, EXIT_OK, EXIT_USAGE, Reporter, main, parse_items, read_urls, valid_items
+
+CLIP = b'\x00\x00\x00\x18ftypmp42' + bytes(4096)
+
+class _ClipHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _handle(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(len(CLIP)))
+        self.end_headers()
+        if self.command == 'GET':
+            self.wfile.write(CLIP)
+
+    do_HEAD = _handle
+    do_GET = _handle
+
+    def log_message(self, *args):
+        pass
+
+class TestDownloadCli(unittest.TestCase):
+    def test_parse_items(self):
+        self.assertEqual(parse_items(None, 3), [1, 2, 3])
+        self.assertEqual(parse_items('1-2,5,9-', 10), [1, 2, 5, 9, 10])
+        self.assertEqual(parse_items('4,20', 5), [4])
+        self.assertEqual(parse_items('50', 10), [])
+        self.assertTrue(valid_items('1-2, 5,9-,-3'))
+        self.assertFalse(valid_items('a-b'))
+        self.assertFalse(valid_items(','))
+
+    def test_malformed_items_is_usage_error(self):
+        with self.assertRaises(SystemExit) as cm:
+            main(['--skip-setup', '--items', 'a-b', 'https://example.com/list'])
+        self.assertEqual(cm.exception.code, EXIT_USAGE)
+
+    def test_read_urls_skips_comments(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write("# list\nhttps://a.example/1\n\n  https://a.example/2  \n")
+        try:
+            self.assertEqual(read_urls(f.name), ['https://a.example/1', 'https://a.example/2'])
+        finally:
+            os.remove(f.name)
+
+    def test_reporter_status_is_json(self):
+        out = StringIO()
+        Reporter(out).status('Starting: clip (1/1)')
+        self.assertEqual(json.loads(out.getvalue()), {'event': 'status', 'message': 'Starting: clip (1/1)'})
+
+    def test_download_keeps_stdout_to_json_events(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _ClipHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/clip.mp4"
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {**os.environ, 'YTD_CACHE_DIR': os.path.join(tmp, 'cache')}
+                proc = subprocess.run([sys.executable, '-m', 'download_cli', '--skip-setup', '--container', 'auto',
+                                       '-o', os.path.join(tmp, 'out'), url],
+                                      cwd=os.path.dirname(os.path.abspath(__file__)),
+                                      env=env, capture_output=True, text=True, timeout=120)
+                saved = os.listdir(os.path.join(tmp, 'out'))
+        finally:
+            server.shutdown()
+        self.assertEqual(proc.returncode, EXIT_OK, proc.stderr)
+        # Every stdout line is an event; yt-dlp's own output stays off stdout
+        events = [json.loads(line) for line in proc.stdout.splitlines()]
+        names = [e['event'] for e in events]
+        self.assertIn('status', names)
+        self.assertEqual(names[-2:], ['done', 'summary'])
+        self.assertTrue(any(e['message'].startswith('Starting:') for e in events if e['event'] == 'status'))
+        self.assertTrue(any(name.endswith('.mp4') for name in saved))
+
+    def test_items_out_of_range_downloads_nothing(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _ClipHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/clip.mp4"
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {**os.environ, 'YTD_CACHE_DIR': os.path.join(tmp, 'cache')}
+                proc = subprocess.run([sys.executable, '-m', 'download_cli', '--skip-setup', '--items', '50',
+                                       '-o', os.path.join(tmp, 'out'), url],
+                                      cwd=os.path.dirname(os.path.abspath(__file__)),
+                                      env=env, capture_output=True, text=True, timeout=120)
+                downloaded = os.path.exists(os.path.join(tmp, 'out'))
+        finally:
+            server.shutdown()
+        self.assertEqual(proc.returncode, EXIT_FAILED, proc.stderr)
+        self.assertEqual([json.loads(line)['event'] for line in proc.stdout.splitlines()], ['error', 'summary'])
+        self.assertFalse(downloaded)
+
+    def test_no_urls_is_usage_error(self):
+        with self.assertRaises(SystemExit) as cm:
+            main(['--skip-setup'])
+        self.assertEqual(cm.exception.code, EXIT_USAGE)
+
+    def test_unreachable_url_reports_error_without_gui_imports(self):
+        script = (
+            "import sys, download_cli\n"
+            "rc = download_cli.main(['--skip-setup', 'http://127.0.0.1:9/nothing'])\n"
+            "assert 'PyQt5' not in sys.modules and 'tkinter' not in sys.modules\n"
+            "sys.exit(rc)\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, 'YTD_CACHE_DIR': tmp}
+            proc = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                  env=env, capture_output=True, text=True, timeout=120)
+        self.assertEqual(proc.returncode, EXIT_FAILED, proc.stderr)
+        events = [json.loads(line) for line in proc.stdout.splitlines()]
+        self.assertEqual([e['event'] for e in events], ['error', 'summary'])
+        self.assertEqual(events[-1]['failed'], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from download_engine import DownloadEngine, ItemResult, MAX_ATTEMPTS, safe_dirname
+from playlist import PlaylistEntry
+
+class TestDownloadEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.entries = [
+            PlaylistEntry(id='a', title='First', url='https://example.com/a', playlist='My: List', playlist_index=1),
+            PlaylistEntry(id='b', title='Second', playlist='My: List', playlist_index=2),
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_item_options_are_shared_by_every_front_end(self):
+        engine = DownloadEngine(url='https://example.com/list', download_dir=self.tmp.name, entries=self.entries,
+                                redownload=[1], playlist_subdirs=True)
+        first = engine._item_options(1, '1/2', engine._item_target(1))
+        second = engine._item_options(2, '2/2', engine._item_target(2))
+        self.assertEqual(first['socket_timeout'], 60)
+        self.assertEqual(first['http_headers']['Referer'], 'https://example.com/list')
+        self.assertNotIn('playlist_items', first)
+        self.assertNotIn('download_archive', first)
+        # An entry without its own URL is picked from the playlist by its 1-based position
+        self.assertEqual(second['playlist_items'], '2')
+        self.assertIn('download_archive', second)
+        self.assertEqual(second['paths']['home'], os.path.join(self.tmp.name, safe_dirname('My: List')))
+
+    def test_explicit_empty_selection_stays_empty(self):
+        engine = DownloadEngine(url='https://example.com/list', download_dir=self.tmp.name, entries=self.entries,
+                                selected_indices=[])
+        self.assertEqual(engine.selected_indices, [])
+        engine = DownloadEngine(url='https://example.com/list', download_dir=self.tmp.name, entries=self.entries)
+        self.assertEqual(engine.selected_indices, [1, 2])
+
+    def test_audio_mode_uses_the_output_plan(self):
+        engine = DownloadEngine(url='https://example.com/a', download_dir=self.tmp.name, mode='Audio', audio_target='m4a')
+        opts = engine._item_options(1, '1/1', engine.url)
+        self.assertEqual(opts['format'], 'bestaudio[acodec^=mp4a]/bestaudio/best')
+        self.assertEqual(opts['postprocessors'], [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'm4a'}])
+        engine = DownloadEngine(url='https://example.com/a', download_dir=self.tmp.name, container='mp4')
+        self.assertEqual(engine._item_options(1, '1/1', engine.url)['merge_output_format'], 'mp4')
+
+    def test_failed_item_asks_before_giving_up(self):
+        asked = []
+        engine = DownloadEngine(url='http://127.0.0.1:9/nothing', download_dir=self.tmp.name, use_archive=False,
+                                use_cache=False, on_retry=lambda *args: asked.append(args) or False)
+        results = engine.run()
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0], ItemResult)
+        self.assertEqual((results[0].index, results[0].ok), (1, False))
+        self.assertTrue(results[0].error)
+        self.assertEqual(asked, [('1/1', 'item 1', MAX_ATTEMPTS)])
+        self.assertEqual((engine.success_count, engine.failure_count), (0, 1))
+
+if __name__ == "__main__":
+    unittest.main()
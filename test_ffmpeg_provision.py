@@ -0,0 +1,125 @@
+import io
+import os
+import hashlib
+import tarfile
+import zipfile
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import ffmpeg_provision
+from ffmpeg_provision import Build, FFmpegProvisioner, add_to_path, extract_binaries
+
+FAKE_FFMPEG = b"#!/bin/sh\necho 'ffmpeg version 9.9-static Copyright (c) the FFmpeg developers'\n"
+
+def _fixture_tar():
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w:xz') as tf:
+        for name, data in [('readme.txt', b'x' * 5000), ('model/vmaf.json', b'{}'), ('ffmpeg', FAKE_FFMPEG), ('ffprobe', FAKE_FFMPEG)]:
+            info = tarfile.TarInfo(f'ffmpeg-9.9-amd64-static/{name}')
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+class _FileHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    files = {}
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get('Range')))
+        data = self.files.get(self.path)
+        if data is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        start = 0
+        if self.headers.get('Range'):
+            start = int(self.headers['Range'].split('=')[1].rstrip('-'))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(data) - start))
+        self.end_headers()
+        self.wfile.write(data[start:])
+
+    def log_message(self, *args):
+        pass
+
+class TestFFmpegProvision(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.archive = _fixture_tar()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _FileHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        _FileHandler.requests_seen.clear()
+        _FileHandler.files.clear()
+        _FileHandler.files['/ffmpeg.tar.xz'] = self.archive
+        self.build = Build('test', f'{self.base}/ffmpeg.tar.xz', f'{self.base}/ffmpeg.tar.xz.md5', 'md5', ('ffmpeg', 'ffprobe'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _serve_checksum(self, digest):
+        _FileHandler.files['/ffmpeg.tar.xz.md5'] = f"{digest}  ffmpeg.tar.xz\n".encode()
+
+    def test_resumes_verifies_and_extracts_only_binaries(self):
+        self._serve_checksum(hashlib.md5(self.archive).hexdigest())
+        downloads = os.path.join(self.tmp.name, 'downloads')
+        os.makedirs(downloads)
+        half = len(self.archive) // 2
+        with open(os.path.join(downloads, 'ffmpeg.tar.xz.part'), 'wb') as f:
+            f.write(self.archive[:half])
+
+        provisioner = FFmpegProvisioner(self.build, root=self.tmp.name)
+        directory = provisioner.ensure()
+        self.assertIn(('/ffmpeg.tar.xz', f'bytes={half}-'), _FileHandler.requests_seen)
+        self.assertEqual(directory, os.path.join(self.tmp.name, 'test', 'ffmpeg-9.9-amd64-static'))
+        self.assertEqual(sorted(os.listdir(directory)), ['ffmpeg', 'ffprobe'])
+        self.assertEqual(os.listdir(downloads), [])
+        self.assertEqual(provisioner.version(), '9.9-static')
+
+        # A later run trusts the recorded install: no download, no probe
+        _FileHandler.requests_seen.clear()
+        with mock.patch.object(ffmpeg_provision, 'probe_version') as probe:
+            self.assertEqual(FFmpegProvisioner(self.build, root=self.tmp.name).ensure(), directory)
+        self.assertEqual(_FileHandler.requests_seen, [])
+        probe.assert_not_called()
+
+    def test_checksum_mismatch_discards_archive(self):
+        self._serve_checksum('0' * 32)
+        provisioner = FFmpegProvisioner(self.build, root=self.tmp.name)
+        with self.assertRaises(RuntimeError):
+            provisioner.ensure()
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, 'downloads')), [])
+        self.assertIsNone(provisioner.installed())
+
+    def test_extracts_from_zip_layout(self):
+        path = os.path.join(self.tmp.name, 'build.zip')
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('ffmpeg-9.9-essentials_build/doc/ffmpeg.html', '<html>')
+            zf.writestr('ffmpeg-9.9-essentials_build/bin/ffmpeg.exe', 'exe')
+            zf.writestr('ffmpeg-9.9-essentials_build/bin/ffprobe.exe', 'exe')
+        out = os.path.join(self.tmp.name, 'out')
+        self.assertEqual(extract_binaries(path, ('ffmpeg.exe', 'ffprobe.exe'), out), 'ffmpeg-9.9-essentials_build')
+        self.assertEqual(sorted(os.listdir(out)), ['ffmpeg.exe', 'ffprobe.exe'])
+
+    def test_add_to_path_once(self):
+        with mock.patch.dict(os.environ, {'PATH': '/usr/bin'}):
+            add_to_path('/opt/ffmpeg')
+            add_to_path('/opt/ffmpeg')
+            self.assertEqual(os.environ['PATH'], os.pathsep.join(['/usr/bin', '/opt/ffmpeg']))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from ffmpeg_tools import STDERR_TAIL_LINES, UP_TO_DATE, ConversionPool, ProgressParser, convert_to_mp4, format_progress, is_up_to_date, mp4_target, run_ffmpeg, summarize
+
+class TestConversionPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = []
+        for i in range(6):
+            path = os.path.join(self.tmp.name, f"{i}.mkv")
+            with open(path, 'wb') as f:
+                f.write(b'x' * 1000 * (i + 1))
+            self.files.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_mp4_target(self):
+        self.assertEqual(mp4_target('/a/b.mkv'), '/a/b.mp4')
+        self.assertIsNone(mp4_target('/a/b.MP4'))
+
+    def test_caps_per_disk_and_reports_every_file(self):
+        lock = threading.Lock()
+        running = [0, 0]
+        def convert(path, on_progress=None):
+            on_progress({'percent': 50.0, 'speed': 20.0})
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            if path.endswith('3.mkv'):
+                return False, 'broken'
+            return True, path[:-4] + '.mp4'
+        events = []
+        pool = ConversionPool(max_workers=4, per_disk_limit=2, convert=convert)
+        results = pool.run(self.files, events.append)
+        self.assertEqual(running[1], 2)  # all files share one disk
+        self.assertEqual([p for p, _, _ in results], self.files)
+        self.assertEqual([ok for _, ok, _ in results], [True, True, True, False, True, True])
+        finished = [d for d in events if d['status'] in ('finished', 'error')]
+        self.assertEqual(len(finished), 6)
+        self.assertEqual((finished[-1]['completed'], finished[-1]['failed']), (5, 1))
+        self.assertEqual(finished[-1]['eta'], 0)
+        self.assertIn('[6/6]', format_progress(finished[-1]))
+        halfway = next(d for d in events if d['status'] == 'progress')
+        self.assertIn('50% at 20.0x', format_progress(halfway))
+
+    def test_cancel_stops_pending_files(self):
+        pool = ConversionPool(max_workers=1, per_disk_limit=1, convert=lambda path, on_progress=None: (pool.cancel(), (True, path))[1])
+        results = pool.run(self.files)
+        self.assertEqual(sum(1 for _, ok, _ in results if ok), 1)
+        self.assertEqual(results[-1][2], 'Cancelled')
+
+class TestFfmpegProgress(unittest.TestCase):
+    def test_parser_emits_one_snapshot_per_block(self):
+        parser = ProgressParser(duration=100)
+        lines = ['frame=10', 'out_time_us=25000000', 'total_size=1024', 'speed=5.0x', 'progress=continue',
+                 'out_time_us=N/A', 'speed=N/A', 'progress=end']
+        snapshots = [d for d in map(parser.feed, lines) if d is not None]
+        self.assertEqual(len(snapshots), 2)
+        self.assertEqual(snapshots[0]['percent'], 25.0)
+        self.assertEqual(snapshots[0]['speed'], 5.0)
+        self.assertEqual(snapshots[0]['eta'], 15.0)
+        self.assertEqual(snapshots[0]['total_size'], 1024)
+        self.assertEqual((snapshots[1]['status'], snapshots[1]['percent']), ('end', 100.0))
+
+    def test_run_ffmpeg_streams_progress_and_bounds_stderr(self):
+        script = (
+            "import sys\n"
+            "for i in range(5000): sys.stderr.write(f'log line {i}\\n')\n"
+            "for t in (1, 2): print(f'out_time_us={t * 1000000}'); print('speed=2x'); print('progress=continue', flush=True)\n"
+            "print('progress=end')\n"
+            "sys.exit(1)\n"
+        )
+        seen = []
+        returncode, stderr = run_ffmpeg([sys.executable, '-c', script], duration=4, on_progress=seen.append)
+        self.assertEqual(returncode, 1)
+        self.assertEqual([d['percent'] for d in seen], [25.0, 50.0, 100.0])
+        self.assertEqual(len(stderr.splitlines()), STDERR_TAIL_LINES)
+        self.assertTrue(stderr.endswith('log line 4999'))
+
+    def test_run_ffmpeg_stops_process_when_callback_fails(self):
+        script = (
+            "import os, sys, time\n"
+            "print(f'pid={os.getpid()}'); print('progress=continue', flush=True)\n"
+            "time.sleep(60)\n"
+        )
+        pids = []
+
+        def on_progress(d):
+            raise RuntimeError('window closed')
+
+        with mock.patch('ffmpeg_tools.ProgressParser.feed', side_effect=lambda line: pids.append(line) or {}):
+            with self.assertRaises(RuntimeError):
+                run_ffmpeg([sys.executable, '-c', script], on_progress=on_progress)
+        pid = int(pids[0].strip().split('=')[1])
+        # ffmpeg was killed and reaped before the error reached the caller
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return
+        os.kill(pid, 9)
+        self.fail('ffmpeg still running after on_progress raised')
+
+FAKE_FFMPEG = """#!{python}
+import os, sys
+out = sys.argv[-1]
+if os.environ.get('FAKE_FFMPEG_FAIL'):
+    open(out, 'wb').write(b'trunc')
+    sys.stderr.write('Invalid data found when processing input\\n')
+    sys.exit(1)
+open(out, 'wb').write(b'converted')
+print('progress=end')
+"""
+
+FAKE_FFPROBE = """#!{python}
+print('12.5')
+"""
+
+@unittest.skipUnless(os.name == 'posix', 'fake ffmpeg is a shell script')
+class TestIncrementalConversion(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        bindir = os.path.join(self.tmp.name, 'bin')
+        os.mkdir(bindir)
+        for name, body in (('ffmpeg', FAKE_FFMPEG), ('ffprobe', FAKE_FFPROBE)):
+            path = os.path.join(bindir, name)
+            with open(path, 'w') as f:
+                f.write(body.format(python=sys.executable))
+            os.chmod(path, 0o755)
+        self.env = mock.patch.dict(os.environ, {'PATH': bindir + os.pathsep + os.environ.get('PATH', '')})
+        self.env.start()
+        self.src = os.path.join(self.tmp.name, 'clip.mkv')
+        with open(self.src, 'wb') as f:
+            f.write(b'source')
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_converts_then_skips_unchanged(self):
+        self.assertEqual(convert_to_mp4(self.src), (True, mp4_target(self.src)))
+        self.assertFalse(os.path.exists(mp4_target(self.src) + '.part'))
+        self.assertEqual(convert_to_mp4(self.src), (True, UP_TO_DATE))
+        self.assertEqual(convert_to_mp4(self.src, incremental=False), (True, mp4_target(self.src)))
+
+    def test_stale_or_mismatched_target_is_redone(self):
+        target = mp4_target(self.src)
+        with open(target, 'wb') as f:
+            f.write(b'old')
+        os.utime(target, (1, 1))
+        self.assertFalse(is_up_to_date(self.src, target))
+        os.utime(target)
+        self.assertTrue(is_up_to_date(self.src, target))
+        with mock.patch('ffmpeg_tools.probe_duration', side_effect=[12.5, 3.0]):
+            self.assertFalse(is_up_to_date(self.src, target))
+
+    def test_failed_run_keeps_previous_target(self):
+        target = mp4_target(self.src)
+        with mock.patch.dict(os.environ, {'FAKE_FFMPEG_FAIL': '1'}):
+            ok, message = convert_to_mp4(self.src)
+        self.assertFalse(ok)
+        self.assertIn('Invalid data', message)
+        self.assertFalse(os.path.exists(target))
+        self.assertFalse(os.path.exists(target + '.part'))
+
+    def test_summary_counts_skipped(self):
+        results = [('a', True, 'a.mp4'), ('b', True, UP_TO_DATE), ('c', False, 'boom')]
+        self.assertTrue(summarize(results).startswith('Converted: 1, Up to date: 1, Failed: 1'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from folder_scanner import FolderScanner, is_video
+
+class TestFolderScanner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'media')
+        self.index_dir = os.path.join(self.tmp.name, 'index')
+        os.makedirs(self.index_dir)
+        self.expected = []
+        for d in range(5):
+            sub = os.path.join(self.root, f"show{d}", 'season1')
+            os.makedirs(sub)
+            for i in range(30):
+                name = f"ep{i}.MKV" if i % 2 else f"ep{i}.mp4"
+                open(os.path.join(sub, name), 'w').close()
+                self.expected.append(os.path.join(sub, name))
+            open(os.path.join(sub, 'notes.txt'), 'w').close()
+        self.expected.sort()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def scanner(self, **kwargs):
+        return FolderScanner(workers=4, index_dir=self.index_dir, **kwargs)
+
+    def test_is_video(self):
+        self.assertTrue(is_video('a.WebM'))
+        self.assertFalse(is_video('a.mkv.part'))
+
+    def test_finds_videos_in_batches(self):
+        batches = []
+        found = self.scanner(batch_size=7).scan(self.root, batches.append)
+        self.assertEqual(found, self.expected)
+        self.assertEqual(sorted(p for b in batches for p in b), self.expected)
+        self.assertTrue(all(len(b) <= 30 for b in batches))
+
+    def test_rescan_lists_only_changed_directories(self):
+        self.scanner().scan(self.root)
+        listed = []
+        scanner = self.scanner()
+        original = scanner._list_dir
+        scanner._list_dir = lambda path: (listed.append(path), original(path))[1]
+        self.assertEqual(scanner.scan(self.root), self.expected)
+        self.assertEqual(listed, [])
+
+        changed = os.path.join(self.root, 'show2', 'season1')
+        added = os.path.join(changed, 'new.webm')
+        open(added, 'w').close()
+        os.utime(changed, ns=(0, os.stat(changed).st_mtime_ns + 1_000_000_000))
+        self.assertIn(added, scanner.scan(self.root))
+        self.assertEqual(listed, [changed])
+
+    def test_without_index(self):
+        self.assertEqual(FolderScanner(use_index=False).scan(self.root), self.expected)
+        self.assertEqual(os.listdir(self.index_dir), [])
+
+if __name__ == "__main__":
+    unittest.main()
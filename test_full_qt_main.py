@@ -1,8 +1,12 @@
 import unittest
-from qt_main import get_default_download_dir, CookieCollector, MainWindow, DownloadWorker, FfmpegConvertWorker, APP_NAME, DEFAULT_DOWNLOAD_DIR
+from qt_main import get_default_download_dir, CookieCollector, MainWindow, DownloadWorker, FfmpegConvertWorker, PlaylistModel, ScanWorker, APP_NAME, DEFAULT_DOWNLOAD_DIR
 import os
+import time
+import threading
 import tempfile
+from unittest import mock
 from PyQt5.QtWidgets import QApplication
+from playlist import PlaylistEntry
 
 class TestQtMainFull(unittest.TestCase):
     @classmethod
@@ -51,5 +55,79 @@ class TestQtMainFull(unittest.TestCase):
         fcw = FfmpegConvertWorker(files=[])
         self.assertEqual(fcw.files, [])
 
+    def test_playlist_model_batches_and_filter(self):
+        model = PlaylistModel()
+        model.append_rows([f"{i:05d}. Title {i}" for i in range(20000)])
+        self.assertEqual(model.rowCount(), 20000)
+        model.set_filter('title 1999')
+        self.assertEqual(model.rowCount(), 11)
+        self.assertEqual(model.source_row(0), 1999)
+        model.append_rows(['20000. Title 19990 again'])
+        self.assertEqual(model.rowCount(), 12)
+        model.set_filter('')
+        self.assertEqual(model.rowCount(), 20001)
+
+    def test_scan_worker_throttles_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {'YTD_CACHE_DIR': os.path.join(tmp, 'cache')}):
+            root = os.path.join(tmp, 'media')
+            for d in range(200):
+                sub = os.path.join(root, f"dir{d}")
+                os.makedirs(sub)
+                for i in range(10):
+                    open(os.path.join(sub, f"{i}.mkv"), 'w').close()
+            worker = ScanWorker(root)
+            chunks, done = [], []
+            worker.files_found.connect(chunks.append)
+            worker.finished.connect(done.append)
+            start = time.monotonic()
+            worker.run()
+            elapsed = time.monotonic() - start
+            self.app.processEvents()  # chunks emitted from the scanner threads are queued
+        self.assertEqual(done, [2000])
+        self.assertEqual(sum(len(c) for c in chunks), 2000)
+        self.assertLessEqual(len(chunks), elapsed * 30 + 2)
+
+    def test_scan_replaces_fetched_playlist(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {'YTD_CACHE_DIR': os.path.join(tmp, 'cache')}):
+            for name in ('a.mkv', 'b.mkv'):
+                open(os.path.join(tmp, name), 'w').close()
+            mw = MainWindow()
+            mw.url_edit.setText('https://example.com/list')
+            mw.playlist_entries = [PlaylistEntry(id='x', title='Old', url='https://example.com/x')]
+            with mock.patch('qt_main.QtWidgets.QFileDialog.getExistingDirectory', return_value=tmp):
+                mw.scan_folder()
+            deadline = time.monotonic() + 10
+            while mw.scan_worker is not None and time.monotonic() < deadline:
+                self.app.processEvents()
+            self.assertEqual(mw.playlist_entries, [])
+            self.assertEqual(len(mw.scanned_files), 2)
+            # Start must not read scanned rows as playlist positions
+            with mock.patch('qt_main.DownloadWorker') as worker, mock.patch.object(mw, 'show_message') as message:
+                mw.download_selected()
+            worker.assert_not_called()
+            message.assert_called_once()
+
+    def test_close_waits_for_blocked_fetch(self):
+        release = threading.Event()
+
+        def blocked_resolve(url):
+            # Stands in for extract_info stuck on the network; cancel() cannot interrupt it
+            release.wait(10)
+            raise RuntimeError('offline')
+
+        mw = MainWindow()
+        mw.show()
+        mw.url_edit.setText('https://example.com/list')
+        with mock.patch.object(mw, 'resolve_final_url', side_effect=blocked_resolve), mock.patch.object(mw, 'show_message'):
+            mw.fetch_videos()
+            self.assertFalse(mw.close())
+            self.assertTrue(mw.isVisible())
+            release.set()
+            deadline = time.monotonic() + 10
+            while mw.isVisible() and time.monotonic() < deadline:
+                self.app.processEvents()
+        self.assertFalse(mw.isVisible())
+        self.assertEqual(mw._threads, set())
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,91 @@
+import io
+import os
+import sys
+import time
+import tempfile
+import unittest
+from yt_dlp.networking import Response
+from yt_dlp.networking.exceptions import HTTPError
+from yt_dlp.utils import DownloadError
+import metadata_cache
+from metadata_cache import MetadataCache, normalize_url
+
+
+class _FailingYDL:
+    """Stands in for YoutubeDL: processing cached info raises error, download() is recorded"""
+
+    def __init__(self, error):
+        self.params = {}
+        self.error = error
+        self.downloads = []
+
+    def process_ie_result(self, info, download=True):
+        raise self.error
+
+    def download(self, urls):
+        self.downloads.extend(urls)
+
+
+def _download_error(cause):
+    try:
+        raise cause
+    except Exception:
+        return DownloadError(str(cause), sys.exc_info())
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = MetadataCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_normalize_url(self):
+        self.assertEqual(
+            normalize_url('HTTPS://YouTube.com/playlist?list=PL1&si=abc&utm_source=x#top'),
+            'https://youtube.com/playlist?list=PL1')
+
+    def test_roundtrip_and_key_options(self):
+        info = {'id': 'PL1', 'entries': [{'id': 'a', 'title': 'A'}]}
+        self.cache.put('https://youtube.com/playlist?list=PL1', {'extract_flat': True, 'quiet': True}, info)
+        self.assertEqual(self.cache.get('https://youtube.com/playlist?list=PL1&si=x', {'extract_flat': True}), info)
+        self.assertIsNone(self.cache.get('https://youtube.com/playlist?list=PL1', {'extract_flat': False}))
+
+    def test_ttl(self):
+        self.cache.put('https://example.com/a', {}, {'id': 'a'})
+        self.assertIsNotNone(self.cache.get('https://example.com/a', {}, ttl=60))
+        self.assertIsNone(self.cache.get('https://example.com/a', {}, ttl=-1))
+
+    def test_lru_eviction(self):
+        cache = MetadataCache(self.tmp.name, max_bytes=2500)
+        payload = 'x' * 1000
+        cache.put('https://example.com/1', {}, {'p': payload})
+        cache.put('https://example.com/2', {}, {'p': payload})
+        old = time.time() - 100
+        os.utime(cache._path(cache.key('https://example.com/2')), (old, old))
+        cache.put('https://example.com/3', {}, {'p': payload})
+        self.assertIsNone(cache.get('https://example.com/2'))
+        self.assertIsNotNone(cache.get('https://example.com/1'))
+        self.assertIsNotNone(cache.get('https://example.com/3'))
+
+    def test_download_extracts_again_only_for_stale_info(self):
+        url = 'https://example.com/v'
+        info = {'id': 'v', 'formats': [{'format_id': '18', 'url': 'https://cdn.example.com/18'}]}
+        expired = _download_error(HTTPError(Response(io.BytesIO(b''), 'https://cdn.example.com/18', {}, status=403)))
+        self.cache.put(url, {}, info)
+        ydl = _FailingYDL(expired)
+        metadata_cache.download(ydl, url, cache=self.cache)
+        self.assertEqual(ydl.downloads, [url])
+        self.assertIsNone(self.cache.get(url, {}))
+
+        # Disk, network and post-processing errors reach the caller without a second download
+        self.cache.put(url, {}, info)
+        ydl = _FailingYDL(_download_error(OSError('No space left on device')))
+        with self.assertRaises(DownloadError):
+            metadata_cache.download(ydl, url, cache=self.cache)
+        self.assertEqual(ydl.downloads, [])
+        self.assertIsNone(self.cache.get(url, {}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from yt_dlp import YoutubeDL
+from output_plan import AUDIO_TARGETS, VIDEO_CONTAINERS, audio_plan, video_plan
+
+class TestAudioPlan(unittest.TestCase):
+    def test_auto_copies_the_source_codec(self):
+        plan = audio_plan('auto')
+        self.assertEqual(plan['format'], 'bestaudio/best')
+        self.assertEqual(plan['postprocessors'], [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'best'}])
+
+    def test_targets_prefer_a_stream_that_needs_no_transcode(self):
+        plan = audio_plan('m4a', 'bestaudio')
+        self.assertEqual(plan['format'], 'bestaudio[acodec^=mp4a]/bestaudio')
+        self.assertEqual(plan['postprocessors'][0]['preferredcodec'], 'm4a')
+        self.assertTrue(audio_plan('opus')['format'].startswith('bestaudio[acodec=opus]/'))
+
+    def test_mp3_only_when_asked(self):
+        self.assertEqual(audio_plan('mp3')['postprocessors'][0], {'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '192'})
+        with self.assertRaises(ValueError):
+            audio_plan('flac')
+
+    def test_mp4_merges_directly(self):
+        plan = video_plan('mp4', 'bestvideo[height<=720]+bestaudio')
+        self.assertEqual(plan['format'], 'bestvideo[height<=720]+bestaudio')
+        self.assertEqual(plan['merge_output_format'], 'mp4')
+        self.assertEqual(plan['format_sort'], ['res', 'ext:mp4:m4a'])
+        self.assertEqual(video_plan('auto')['postprocessors'], [])
+        with self.assertRaises(ValueError):
+            video_plan('avi')
+
+    def test_mp4_keeps_resolution_over_container(self):
+        formats = [
+            {'format_id': 'vp9-1080', 'url': 'http://a/1', 'ext': 'webm', 'vcodec': 'vp9', 'acodec': 'none', 'height': 1080, 'tbr': 900},
+            {'format_id': 'mp4-720', 'url': 'http://a/2', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'none', 'height': 720, 'tbr': 800},
+            {'format_id': 'm4a', 'url': 'http://a/3', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 128},
+        ]
+        info = {'id': 'x', 'title': 't', 'extractor': 'generic', 'extractor_key': 'Generic', 'webpage_url': 'http://a', 'formats': formats}
+        plan = video_plan('mp4', 'bestvideo+bestaudio')
+        with YoutubeDL({'quiet': True, 'simulate': True, **plan}) as ydl:
+            self.assertEqual(ydl.process_ie_result(dict(info), download=False)['format_id'], 'vp9-1080+m4a')
+        # At equal resolution the mp4 stream wins
+        formats.append({'format_id': 'mp4-1080', 'url': 'http://a/4', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'none', 'height': 1080, 'tbr': 700})
+        with YoutubeDL({'quiet': True, 'simulate': True, **plan}) as ydl:
+            self.assertEqual(ydl.process_ie_result(dict(info), download=False)['format_id'], 'mp4-1080+m4a')
+
+    def test_yt_dlp_accepts_every_plan(self):
+        plans = [audio_plan(t) for t in AUDIO_TARGETS] + [video_plan(c) for c in VIDEO_CONTAINERS]
+        for plan in plans:
+            with YoutubeDL({'quiet': True, **plan}) as ydl:
+                ydl.build_format_selector(plan['format'])
+
+if __name__ == "__main__":
+    unittest.main()
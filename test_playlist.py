@@ -0,0 +1,33 @@
+import unittest
+import sys
+from playlist import DEFAULT_OUTTMPL, PlaylistEntry, entry_outtmpl, entry_url
+
+class TestPlaylistEntries(unittest.TestCase):
+    def test_entry_url_prefers_webpage_url(self):
+        entry = {'webpage_url': 'https://example.com/v/1', 'url': 'https://cdn.example.com/1.mp4'}
+        self.assertEqual(entry_url(entry), 'https://example.com/v/1')
+
+    def test_entry_url_youtube_id_fallback(self):
+        entry = {'id': 'dQw4w9WgXcQ', 'ie_key': 'Youtube', 'url': 'dQw4w9WgXcQ'}
+        self.assertEqual(entry_url(entry), 'https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        self.assertIsNone(entry_url({'id': 'abc'}))
+
+    def test_entry_outtmpl_keeps_playlist_numbering(self):
+        self.assertEqual(entry_outtmpl({'playlist_index': 7, 'n_entries': 120}), '007 - %(title)s.%(ext)s')
+        self.assertEqual(entry_outtmpl({'title': 'single'}), DEFAULT_OUTTMPL)
+
+    def test_playlist_entry_projection(self):
+        raw = {
+            'id': 'abc', 'title': 'Song', 'url': 'https://www.youtube.com/watch?v=abc', 'ie_key': 'Youtube',
+            'playlist': 'Mix', 'playlist_index': 3, 'n_entries': 12,
+            'thumbnails': [{'url': 'https://i.ytimg.com/x.jpg'}] * 20, 'http_headers': {'User-Agent': 'x'},
+        }
+        entry = PlaylistEntry.from_info(raw)
+        self.assertFalse(hasattr(entry, '__dict__'))
+        self.assertEqual(entry.url, 'https://www.youtube.com/watch?v=abc')
+        self.assertEqual(entry_outtmpl(entry), '03 - %(title)s.%(ext)s')
+        self.assertEqual(PlaylistEntry.from_info(entry.to_dict()).to_dict(), entry.to_dict())
+        self.assertLess(sys.getsizeof(entry), sys.getsizeof(raw))
+
+if __name__ == "__main__":
+    unittest.main()
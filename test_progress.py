@@ -0,0 +1,70 @@
+import unittest
+from progress import BatchProgress, ProgressAggregator, format_batch, format_eta, format_snapshot, snapshot
+
+class TestProgressAggregator(unittest.TestCase):
+    def test_snapshot_fields(self):
+        s = snapshot({'status': 'downloading', 'downloaded_bytes': 512, 'total_bytes_estimate': 2048,
+                      'speed': 1024.0, 'eta': 75, 'fragment_index': 3, 'fragment_count': 12, '_percent_str': ' 25%'}, '1/4')
+        self.assertEqual(s['percent'], 25.0)
+        self.assertEqual((s['fragment_index'], s['fragment_count']), (3, 12))
+        self.assertNotIn('_percent_str', s)
+        self.assertEqual(format_snapshot(s), "[1/4] Downloading: 25.0% of 2.0 KiB at 1.0 KiB/s ETA 01:15 (frag 3/12)")
+
+    def test_format_eta(self):
+        self.assertEqual(format_eta(None), '--:--')
+        self.assertEqual(format_eta(75), '01:15')
+        self.assertEqual(format_eta(3725), '1:02:05')
+
+    def test_fragment_percent_without_sizes(self):
+        s = snapshot({'status': 'downloading', 'fragment_index': 5, 'fragment_count': 20})
+        self.assertEqual(s['percent'], 25.0)
+
+    def test_coalesces_bursts_and_never_drops_finish(self):
+        emitted = []
+        agg = ProgressAggregator(emitted.append, interval=60)
+        hook_a, hook_b = agg.hook('a'), agg.hook('b')
+        for i in range(1000):
+            hook_a({'status': 'downloading', 'downloaded_bytes': i, 'total_bytes': 1000})
+            hook_b({'status': 'downloading', 'downloaded_bytes': i, 'total_bytes': 1000})
+        self.assertEqual(len(emitted), 1)
+        hook_a({'status': 'finished', 'filename': 'a.mkv', 'downloaded_bytes': 1000, 'total_bytes': 1000})
+        self.assertEqual(len(emitted), 2)
+        # The finish goes out together with the latest pending state of the other item
+        self.assertEqual({s['label']: s['downloaded_bytes'] for s in emitted[1]}, {'a': 1000, 'b': 999})
+        agg.flush()
+        self.assertEqual(len(emitted), 2)
+        self.assertEqual(agg.items()['a']['percent'], 100.0)
+
+class TestBatchProgress(unittest.TestCase):
+    def snap(self, label, status, done, total=None, speed=None):
+        return snapshot({'status': status, 'downloaded_bytes': done, 'total_bytes': total, 'speed': speed}, label)
+
+    def test_counts_items_until_sizes_are_known(self):
+        batch = BatchProgress(4)
+        self.assertEqual(batch.summary()['percent'], 0.0)
+        batch.item_done('1/4')  # e.g. skipped by the archive
+        self.assertEqual(batch.summary()['percent'], 25.0)
+
+    def test_bytes_across_items_with_estimate_for_pending(self):
+        batch = BatchProgress(4)
+        # Item 1: video and audio files, then merged
+        batch.update([self.snap('1', 'downloading', 600, 800, speed=100)])
+        batch.update([self.snap('1', 'finished', 800, 800)])
+        batch.update([self.snap('1', 'downloading', 100, 200, speed=100)])
+        summary = batch.summary()
+        self.assertEqual(summary['downloaded_bytes'], 900)
+        # 1000 bytes for item 1 plus 3 pending items estimated at the same size
+        self.assertEqual(summary['total_bytes'], 4000)
+        self.assertAlmostEqual(summary['percent'], 22.5)
+        self.assertEqual(summary['eta'], 31.0)
+        batch.update([self.snap('1', 'finished', 200, 200)])
+        batch.item_done('1')
+        batch.update([self.snap('2', 'downloading', 500, 2000, speed=250), self.snap('3', 'downloading', 0, 1000, speed=250)])
+        summary = batch.summary()
+        self.assertEqual(summary['total_bytes'], 1000 + 2000 + 1000 + 4000 / 3)
+        self.assertEqual(summary['speed'], 500)
+        self.assertEqual(summary['items_done'], 1)
+        self.assertTrue(format_batch(summary).startswith('28% - 1.5 KiB of ~5.2 KiB at 500 B/s - ETA 00:07'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import threading
+import time
+import unittest
+from scheduler import DownloadScheduler, host_key
+
+class TestDownloadScheduler(unittest.TestCase):
+    def test_host_key(self):
+        self.assertEqual(host_key('https://www.YouTube.com/watch?v=x'), 'youtube.com')
+        self.assertEqual(host_key('not a url'), '')
+
+    def test_results_in_index_order(self):
+        items = [(3, 'https://a.com/3'), (1, 'https://a.com/1'), (2, 'https://b.com/2')]
+        def task(index, url):
+            time.sleep(0.01 * (4 - index))
+            return url
+        results = DownloadScheduler(max_workers=3).run(items, task)
+        self.assertEqual([i for i, _ in results], [1, 2, 3])
+        self.assertEqual(results[0][1], 'https://a.com/1')
+
+    def test_respects_worker_and_host_caps(self):
+        lock = threading.Lock()
+        running = {'total': 0, 'a.com': 0}
+        peaks = {'total': 0, 'a.com': 0}
+        def task(index, url):
+            host = host_key(url)
+            with lock:
+                running['total'] += 1
+                running[host] = running.get(host, 0) + 1
+                for k in peaks:
+                    peaks[k] = max(peaks[k], running.get(k, 0))
+            time.sleep(0.02)
+            with lock:
+                running['total'] -= 1
+                running[host] -= 1
+            return True
+        items = [(i, f'https://a.com/{i}') for i in range(8)] + [(i, f'https://b.com/{i}') for i in range(8, 12)]
+        done = []
+        DownloadScheduler(max_workers=4, per_host_limit=2).run(items, task, on_result=lambda i, r: done.append(i))
+        self.assertLessEqual(peaks['total'], 4)
+        self.assertLessEqual(peaks['a.com'], 2)
+        self.assertEqual(sorted(done), list(range(12)))
+
+    def test_exception_becomes_result(self):
+        def task(index, url):
+            raise ValueError('boom')
+        results = DownloadScheduler().run([(1, 'https://a.com')], task)
+        self.assertIsInstance(results[0][1], ValueError)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+import setup_helper
+
+class TestEnvironmentStamp(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {'YTD_CACHE_DIR': self.tmp.name})
+        self.env.start()
+        self.packages = ["yt_dlp", "ffmpeg-python"]
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_probe_does_not_import(self):
+        self.assertEqual(setup_helper.module_name("ffmpeg-python"), "ffmpeg")
+        self.assertEqual(setup_helper.missing_packages(["yt_dlp", "no-such-package-xyz"]), ["no-such-package-xyz"])
+
+    def test_stamp_round_trip_and_invalidation(self):
+        self.assertFalse(setup_helper.is_verified(self.packages))
+        setup_helper.write_stamp(self.packages)
+        self.assertTrue(setup_helper.is_verified(self.packages))
+        path = setup_helper._stamp_path(self.packages)
+        with open(path, encoding='utf-8') as f:
+            stamp = json.load(f)
+        stamp['packages']['yt_dlp'] = '0.0'
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(stamp, f)
+        self.assertFalse(setup_helper.is_verified(self.packages))
+
+    def test_each_package_set_keeps_its_own_stamp(self):
+        # The Tk and Qt apps alternate; neither launch may invalidate the other's stamp
+        other = self.packages + ["PyQt5"]
+        setup_helper.write_stamp(self.packages)
+        setup_helper.write_stamp(other)
+        self.assertTrue(setup_helper.is_verified(self.packages))
+        self.assertTrue(setup_helper.is_verified(other))
+        self.assertTrue(setup_helper.is_verified(list(reversed(other))))
+
+    def test_verified_environment_skips_probing(self):
+        setup_helper.write_stamp(self.packages)
+        with mock.patch.object(setup_helper, 'install_missing_packages') as install, \
+                mock.patch.object(setup_helper, 'download_and_setup_ffmpeg') as ffmpeg:
+            setup_helper.full_setup(self.packages)
+        install.assert_not_called()
+        ffmpeg.assert_called_once()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import url_resolver
+
+class _RedirectHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests_seen = []
+    client_ports = []
+
+    def _handle(self):
+        self.requests_seen.append((self.command, self.path))
+        self.client_ports.append(self.client_address[1])
+        if self.path == '/share':
+            self.send_response(302)
+            self.send_header('Location', '/final')
+        elif self.path == '/nohead' and self.command == 'HEAD':
+            self.send_response(405)
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_HEAD = _handle
+    do_GET = _handle
+
+    def log_message(self, *args):
+        pass
+
+class TestUrlResolver(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _RedirectHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        url_resolver.clear_cache()
+        _RedirectHandler.requests_seen.clear()
+        _RedirectHandler.client_ports.clear()
+
+    def test_head_first_and_cached(self):
+        self.assertEqual(url_resolver.resolve_final_url(f"{self.base}/share"), f"{self.base}/final")
+        self.assertEqual([c for c, _ in _RedirectHandler.requests_seen], ['HEAD', 'HEAD'])
+        url_resolver.resolve_final_url(f"{self.base}/share")
+        self.assertEqual(len(_RedirectHandler.requests_seen), 2)
+
+    def test_get_fallback_when_head_rejected(self):
+        self.assertEqual(url_resolver.resolve_final_url(f"{self.base}/nohead"), f"{self.base}/nohead")
+        self.assertEqual([c for c, _ in _RedirectHandler.requests_seen], ['HEAD', 'GET'])
+
+    def test_shared_session_reuses_connection(self):
+        url_resolver.resolve_final_url(f"{self.base}/a")
+        url_resolver.resolve_final_url(f"{self.base}/b")
+        self.assertEqual(len(set(_RedirectHandler.client_ports)), 1)
+
+    def test_canonical_hosts_skip_network(self):
+        url = 'https://www.youtube.com/playlist?list=PL123'
+        self.assertEqual(url_resolver.resolve_final_url(url), url)
+        self.assertTrue(url_resolver.is_canonical('https://music.youtube.com/watch?v=x'))
+        self.assertFalse(url_resolver.is_canonical('https://fb.watch/abc'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import threading
+import unittest
+from ydl_pool import YoutubeDLPool
+
+class TestYoutubeDLPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = YoutubeDLPool()
+        self.base = {'quiet': True, 'postprocessors': [{'key': 'FFmpegVideoRemuxer', 'preferedformat': 'mkv'}]}
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_reuses_instance_and_retargets(self):
+        first = self.pool.acquire({**self.base, 'format': 'best', 'outtmpl': '1 - %(title)s.%(ext)s', 'playlist_items': '1'})
+        second = self.pool.acquire({**self.base, 'format': 'worst', 'outtmpl': '2 - %(title)s.%(ext)s'})
+        self.assertIs(first, second)
+        # The compiled selector must follow the format, not just params
+        formats = [{'format_id': 'lo', 'url': 'http://a/lo', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'mp4a', 'height': 240, 'tbr': 100},
+                   {'format_id': 'hi', 'url': 'http://a/hi', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'mp4a', 'height': 1080, 'tbr': 900}]
+        ctx = {'formats': formats, 'has_merged_format': True, 'incomplete_formats': False}
+        self.assertEqual([f['format_id'] for f in second.format_selector(ctx)], ['lo'])
+        self.assertEqual(second.params['outtmpl']['default'], '2 - %(title)s.%(ext)s')
+        self.assertNotIn('playlist_items', second.params)
+
+    def test_rebuilds_when_construction_options_change(self):
+        first = self.pool.acquire(self.base)
+        second = self.pool.acquire({**self.base, 'postprocessors': []})
+        self.assertIsNot(first, second)
+
+    def test_instance_per_thread(self):
+        seen = []
+        def grab():
+            seen.append(self.pool.acquire(self.base))
+        threads = [threading.Thread(target=grab) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertIsNot(seen[0], seen[1])
+
+    def test_progress_hooks_follow_current_item(self):
+        calls = []
+        ydl = self.pool.acquire({**self.base, 'progress_hooks': [lambda d: calls.append(('a', d['status']))]})
+        self.pool.acquire({**self.base, 'progress_hooks': [lambda d: calls.append(('b', d['status']))]})
+        for hook in ydl._progress_hooks:
+            hook({'status': 'downloading'})
+        self.assertEqual(calls, [('b', 'downloading')])
+
+    def test_progress_hooks_reach_item_from_other_threads(self):
+        # yt-dlp calls progress hooks from its fragment download threads
+        calls = []
+        ydl = self.pool.acquire({**self.base, 'progress_hooks': [lambda d: calls.append(d['status'])]})
+        t = threading.Thread(target=lambda: [hook({'status': 'downloading'}) for hook in ydl._progress_hooks])
+        t.start()
+        t.join()
+        self.assertEqual(calls, ['downloading'])
+
+    def test_postprocessor_hooks_follow_current_item(self):
+        calls = []
+        ydl = self.pool.acquire({**self.base, 'postprocessor_hooks': [lambda d: calls.append('a')]})
+        self.pool.acquire({**self.base, 'postprocessor_hooks': [lambda d: calls.append('b')]})
+        for hook in ydl._postprocessor_hooks:
+            hook({'status': 'started', 'postprocessor': 'FFmpegVideoRemuxer'})
+        self.assertEqual(calls, ['b'])
+
+if __name__ == "__main__":
+    unittest.main()
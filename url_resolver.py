@@ -0,0 +1,68 @@
+# url_resolver.py
+import time
+import logging
+import threading
+
+from http_client import get_session
+from scheduler import host_key
+
+RESOLVE_TTL = 10 * 60
+MAX_CACHED = 256
+
+# Hosts whose URLs yt-dlp handles as-is; resolving them only costs a round trip
+CANONICAL_HOSTS = {
+    'youtube.com', 'youtu.be', 'youtube-nocookie.com', 'vimeo.com', 'dailymotion.com',
+    'twitch.tv', 'soundcloud.com', 'tiktok.com', 'instagram.com', 'twitter.com', 'x.com',
+}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def is_canonical(url):
+    host = host_key(url)
+    return any(host == h or host.endswith('.' + h) for h in CANONICAL_HOSTS)
+
+
+def _request_final_url(url, timeout):
+    import requests
+    session = get_session()
+    # HEAD first: no body at all. Some servers reject HEAD, so fall back to a
+    # streamed GET that is closed before the body is read.
+    try:
+        resp = session.head(url, allow_redirects=True, timeout=timeout)
+        resp.close()
+        if resp.status_code < 400 and resp.url:
+            return resp.url
+    except requests.RequestException:
+        pass
+    resp = session.get(url, allow_redirects=True, timeout=timeout, stream=True)
+    resp.close()
+    return resp.url or url
+
+
+def resolve_final_url(input_url, timeout=15):
+    """Follow redirects (share links, shorteners) to the final page URL, with a TTL cache"""
+    url = (input_url or '').strip()
+    if not url or is_canonical(url):
+        return url
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(url)
+        if cached and cached[0] > now:
+            return cached[1]
+    try:
+        final = _request_final_url(url, timeout)
+    except Exception as e:
+        logging.info(f"Could not resolve {url}: {e}")
+        return url
+    with _cache_lock:
+        if len(_cache) >= MAX_CACHED:
+            _cache.pop(next(iter(_cache)))
+        _cache[url] = (now + RESOLVE_TTL, final)
+    return final
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
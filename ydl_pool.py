@@ -0,0 +1,110 @@
+# ydl_pool.py
+import threading
+
+# Options consumed when YoutubeDL is constructed (post-processors, cookie jar,
+# archive preload, header merge); a change in any of them needs a new instance.
+REBUILD_KEYS = ('postprocessors', 'cookiefile', 'download_archive', 'http_headers', 'logger', 'quiet')
+# Hooks are bound once at construction; they are routed to the instance's current item
+HOOK_KEYS = ('progress_hooks', 'postprocessor_hooks')
+
+
+def _same_build(a, b):
+    for key in REBUILD_KEYS:
+        x, y = a.get(key), b.get(key)
+        if key == 'download_archive' and not isinstance(x, (str, type(None))):
+            if x is not y:
+                return False
+        elif x != y:
+            return False
+    return True
+
+
+class YoutubeDLPool:
+    """One long-lived YoutubeDL per worker thread, re-targeted for every item.
+
+    acquire(opts) returns the calling thread's instance with the per-item
+    options (format, outtmpl, paths, ...) written into its params, instead of
+    paying extractor, cookie-jar and opener setup for each item and retry.
+    Each instance keeps its current item's hooks in its own slot, so hooks
+    called from yt-dlp's fragment download threads still reach them.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._instances = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _dispatcher(hooks, key):
+        def dispatch(d):
+            for hook in hooks[key]:
+                hook(d)
+        return dispatch
+
+    def acquire(self, opts):
+        opts = dict(opts)
+        item_hooks = {key: list(opts.pop(key, None) or []) for key in HOOK_KEYS}
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is not None and _same_build(self._local.build_opts, opts):
+            # Swap the hooks in place: the dispatchers bound into ydl hold this dict
+            self._local.hooks.update(item_hooks)
+            self._retarget(ydl, opts)
+            return ydl
+        self.discard()
+        from yt_dlp import YoutubeDL
+        ydl = YoutubeDL({**opts, **{key: [self._dispatcher(item_hooks, key)] for key in HOOK_KEYS}})
+        self._local.ydl = ydl
+        self._local.hooks = item_hooks
+        self._local.build_opts = opts
+        self._local.item_keys = set(opts)
+        with self._lock:
+            self._instances.append(ydl)
+        return ydl
+
+    def _retarget(self, ydl, opts):
+        params = ydl.params
+        # Drop per-item keys the previous item set but this one does not (e.g. playlist_items)
+        for key in self._local.item_keys - set(opts) - {'outtmpl'}:
+            params.pop(key, None)
+        for key, value in opts.items():
+            if key in REBUILD_KEYS:
+                continue
+            if key == 'outtmpl':
+                params['outtmpl'].update(value if isinstance(value, dict) else {'default': value})
+            elif key == 'format':
+                # The selector is compiled once in YoutubeDL.__init__; params['format'] alone is not read again
+                if value != params.get('format'):
+                    ydl.format_selector = value if value in (None, '-') or callable(value) else ydl.build_format_selector(value)
+                params[key] = value
+            else:
+                params[key] = value
+        self._local.item_keys = set(opts)
+
+    def discard(self):
+        """Close the calling thread's instance, e.g. after a failed attempt"""
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            return
+        self._local.ydl = None
+        with self._lock:
+            if ydl in self._instances:
+                self._instances.remove(ydl)
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()